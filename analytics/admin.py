@@ -1,3 +1,15 @@
 from django.contrib import admin
+from .models import DailyRollup, MonthlyRollup
 
-# Register your models here.
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'parish', 'ministry', 'service', 'attendance_total', 'giving_total', 'expense_total']
+    list_filter = ['parish']
+    date_hierarchy = 'date'
+
+
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['month', 'parish', 'ministry', 'service', 'attendance_total', 'giving_total', 'expense_total']
+    list_filter = ['parish']
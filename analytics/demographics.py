@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.db.models import Case, When, Value, CharField, Count
+from django.utils import timezone
+
+from people.models import Member
+
+# (label, oldest age in the bucket); anything older falls into SENIORS
+AGE_BUCKETS = (
+    ('0-12 (Children)', 12),
+    ('13-19 (Youth)', 19),
+    ('20-35 (Young Adults)', 35),
+    ('36-55 (Adults)', 55),
+)
+SENIORS = '56+ (Seniors)'
+UNKNOWN = 'Unknown'
+AGE_LABELS = [label for label, _ in AGE_BUCKETS] + [SENIORS, UNKNOWN]
+
+DIMENSIONS = ('gender', 'marital_status', 'member_type', 'city')
+
+
+def _years_before(day, years):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # Feb 29 -> Feb 28
+        return day.replace(year=day.year - years, day=28)
+
+
+def age_group_expression(as_of):
+    """
+    CASE over dob: someone is at most N years old on `as_of` when they were
+    born after the date N+1 years earlier.
+    """
+    whens = [When(dob__isnull=True, then=Value(UNKNOWN))]
+    for label, max_age in AGE_BUCKETS:
+        whens.append(When(dob__gt=_years_before(as_of, max_age + 1), then=Value(label)))
+    return Case(*whens, default=Value(SENIORS), output_field=CharField())
+
+
+def demographics(as_of=None):
+    """
+    Age, gender, marital status, member type and city breakdowns of members
+    who had joined by `as_of` (default today), from a single grouped scan.
+    Each breakdown is a list of (label, count).
+    """
+    as_of = as_of or timezone.now().date()
+
+    rows = Member.objects.filter(created_at__date__lte=as_of)\
+        .annotate(age_group=age_group_expression(as_of))\
+        .values('age_group', *DIMENSIONS)\
+        .annotate(n=Count('id'))\
+        .order_by()
+
+    counters = {dim: Counter() for dim in ('age_group',) + DIMENSIONS}
+    for row in rows:
+        for dim, counter in counters.items():
+            counter[row[dim] or UNKNOWN] += row['n']
+
+    result = {'age_group': [(label, counters['age_group'][label]) for label in AGE_LABELS]}
+    for dim in DIMENSIONS:
+        result[dim] = counters[dim].most_common()
+    return result
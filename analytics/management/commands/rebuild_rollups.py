@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import rebuild_all
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily/monthly dashboard rollups from Attendance, Finance, Expense & CommunityImpact'
+
+    def handle(self, *args, **options):
+        # bulk_create (used by the seed commands) skips signals, so run this after seeding
+        self.stdout.write("Rebuilding rollups...")
+        days, months = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {days} daily and {months} monthly rollup rows.'))
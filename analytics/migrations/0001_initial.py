@@ -0,0 +1,56 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('ministry', '0005_announcement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('attendance_total', models.IntegerField(default=0)),
+                ('attendance_services', models.IntegerField(default=0)),
+                ('first_timers', models.IntegerField(default=0)),
+                ('giving_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('people_impacted', models.IntegerField(default=0)),
+                ('ministry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ministry.ministry')),
+                ('parish', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ministry.parish')),
+                ('service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ministry.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='analytics_d_date_38bd00_idx')],
+                'unique_together': {('date', 'parish', 'ministry', 'service')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('attendance_total', models.IntegerField(default=0)),
+                ('attendance_services', models.IntegerField(default=0)),
+                ('first_timers', models.IntegerField(default=0)),
+                ('giving_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('people_impacted', models.IntegerField(default=0)),
+                ('ministry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ministry.ministry')),
+                ('parish', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ministry.parish')),
+                ('service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='ministry.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='analytics_m_month_1a772f_idx')],
+                'unique_together': {('month', 'parish', 'ministry', 'service')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:27
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.db.models.functions import Coalesce
+
+
+def drop_duplicate_buckets(apps, schema_editor):
+    # unique_together let NULL-keyed buckets repeat on SQLite. Every refresh
+    # recomputes a whole bucket, so the newest row of each is the complete one
+    for model_name, period in (('DailyRollup', 'date'), ('MonthlyRollup', 'month')):
+        model = apps.get_model('analytics', model_name)
+        fields = (period, 'parish', 'ministry', 'service')
+        groups = model.objects.values(*fields).annotate(n=Count('id'), keep=Max('id')).filter(n__gt=1)
+        for group in groups:
+            model.objects.filter(**{f: group[f] for f in fields}).exclude(pk=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        ('ministry', '0005_announcement'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='dailyrollup',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='monthlyrollup',
+            unique_together=set(),
+        ),
+        migrations.RunPython(drop_duplicate_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(models.F('date'), Coalesce('parish', models.Value(0)), Coalesce('ministry', models.Value(0)), Coalesce('service', models.Value(0)), name='daily_rollup_bucket_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyrollup',
+            constraint=models.UniqueConstraint(models.F('month'), Coalesce('parish', models.Value(0)), Coalesce('ministry', models.Value(0)), Coalesce('service', models.Value(0)), name='monthly_rollup_bucket_unique'),
+        ),
+    ]
@@ -1,3 +1,62 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from ministry.models import Ministry, Parish, Service
 
-# Create your models here.
+
+def bucket_unique(period, name):
+    """
+    Unique (period, parish, ministry, service) with NULL meaning "none": SQLite
+    treats NULLs as distinct (and nulls_distinct=False is PostgreSQL-only), so the
+    nullable keys are indexed as COALESCE(id, 0). Ids start at 1, so 0 is free.
+    """
+    return models.UniqueConstraint(
+        F(period), *(Coalesce(key, Value(0)) for key in ('parish', 'ministry', 'service')), name=name,
+    )
+
+
+class DailyRollup(models.Model):
+    """
+    Pre-aggregated totals for a single day, keyed by parish/ministry/service.
+    Kept current by analytics.signals; rebuilt with `manage.py rebuild_rollups`.
+    """
+    date = models.DateField()
+    parish = models.ForeignKey(Parish, on_delete=models.CASCADE, null=True, blank=True)
+    ministry = models.ForeignKey(Ministry, on_delete=models.CASCADE, null=True, blank=True)
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, null=True, blank=True)
+
+    attendance_total = models.IntegerField(default=0)
+    attendance_services = models.IntegerField(default=0) # Number of Attendance records
+    first_timers = models.IntegerField(default=0)
+    giving_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    people_impacted = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [bucket_unique('date', 'daily_rollup_bucket_unique')]
+        indexes = [models.Index(fields=['date'])]
+
+    def __str__(self):
+        return f"Rollup {self.date}"
+
+
+class MonthlyRollup(models.Model):
+    """Same totals as DailyRollup, summed per calendar month (month = 1st of month)."""
+    month = models.DateField()
+    parish = models.ForeignKey(Parish, on_delete=models.CASCADE, null=True, blank=True)
+    ministry = models.ForeignKey(Ministry, on_delete=models.CASCADE, null=True, blank=True)
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, null=True, blank=True)
+
+    attendance_total = models.IntegerField(default=0)
+    attendance_services = models.IntegerField(default=0)
+    first_timers = models.IntegerField(default=0)
+    giving_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    people_impacted = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [bucket_unique('month', 'monthly_rollup_bucket_unique')]
+        indexes = [models.Index(fields=['month'])]
+
+    def __str__(self):
+        return f"Rollup {self.month:%b %Y}"
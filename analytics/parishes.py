@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.db.models import OuterRef, Subquery, Sum, Count, F, Case, When, Value, FloatField, DecimalField, IntegerField
+from django.db.models.functions import Coalesce, Cast
+
+from ministry.models import Parish
+from people.models import Member
+from .models import MonthlyRollup
+
+# ?sort= keys accepted by the parish report -> annotated column
+SORT_FIELDS = {
+    'name': 'name',
+    'returns': 'returns',
+    'prev_returns': 'prev_returns',
+    'returns_growth': 'returns_growth',
+    'members': 'members',
+    'members_growth': 'members_growth',
+}
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _returns(year):
+    qs = MonthlyRollup.objects.filter(parish=OuterRef('pk'), month__year=year)\
+        .order_by().values('parish').annotate(total=Sum('giving_total')).values('total')
+    return Coalesce(Subquery(qs, output_field=MONEY), Value(Decimal('0')), output_field=MONEY)
+
+
+def _members_up_to(year):
+    # Cumulative: joined on or before Dec 31 of `year`
+    qs = Member.objects.filter(parish=OuterRef('pk'), created_at__year__lte=year)\
+        .order_by().values('parish').annotate(n=Count('id')).values('n')
+    return Coalesce(Subquery(qs, output_field=IntegerField()), Value(0))
+
+
+def _growth(curr, prev):
+    # Same rule as the old dashboard loop: % change, 100 if starting from zero
+    return Case(
+        When(**{f'{prev}__gt': 0}, then=(Cast(F(curr), FloatField()) - Cast(F(prev), FloatField())) * 100.0 / Cast(F(prev), FloatField())),
+        When(**{f'{curr}__gt': 0}, then=Value(100.0)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def parish_performance(year):
+    """
+    Every parish annotated with returns (this/previous year), cumulative member
+    counts and growth %, computed in a single query so it can be sorted & paginated in SQL.
+    """
+    return Parish.objects.annotate(
+        returns=_returns(year),
+        prev_returns=_returns(year - 1),
+        members=_members_up_to(year),
+        prev_members=_members_up_to(year - 1),
+    ).annotate(
+        returns_growth=_growth('returns', 'prev_returns'),
+        members_growth=_growth('members', 'prev_members'),
+    )
+
+
+def order_by_param(queryset, sort):
+    field = SORT_FIELDS.get((sort or '').lstrip('-'), 'returns')
+    direction = '-' if (sort or '-').startswith('-') else ''
+    return queryset.order_by(f'{direction}{field}', 'name')
+
+
+def as_row(parish):
+    return {
+        'id': parish.pk,
+        'name': parish.name,
+        'location': parish.address or 'Main Campus',
+        'returns': parish.returns,
+        'prev_returns': parish.prev_returns,
+        'returns_growth': int(parish.returns_growth),
+        'members': parish.members,
+        'members_growth': int(parish.members_growth),
+    }
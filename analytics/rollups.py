@@ -0,0 +1,195 @@
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Sum, Count, Q
+from django.db.models.functions import TruncMonth
+
+from operations.models import Attendance, Finance, Expense, CommunityImpact
+from .models import DailyRollup, MonthlyRollup
+
+METRIC_FIELDS = (
+    'attendance_total', 'attendance_services', 'first_timers',
+    'giving_total', 'expense_total', 'people_impacted',
+)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _next_month(month):
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def rollup_key(instance):
+    """The (date, parish_id, ministry_id, service_id) bucket a source row feeds into."""
+    day = _as_date(instance.date)
+    if isinstance(instance, Attendance):
+        return (day, instance.parish_id, instance.ministry_id, instance.service_id)
+    if isinstance(instance, Finance):
+        return (day, instance.parish_id, instance.ministry_id, None)
+    # Expense & CommunityImpact are church-wide
+    return (day, None, None, None)
+
+
+def _empty_totals():
+    return dict.fromkeys(METRIC_FIELDS, 0)
+
+
+def _day_totals(day, parish_id, ministry_id, service_id):
+    totals = _empty_totals()
+
+    att = Attendance.objects.filter(
+        date=day, parish_id=parish_id, ministry_id=ministry_id, service_id=service_id
+    ).aggregate(total=Sum('total_count'), services=Count('id'), first_timers=Sum('first_timers_count'))
+    totals['attendance_total'] = att['total'] or 0
+    totals['attendance_services'] = att['services'] or 0
+    totals['first_timers'] = att['first_timers'] or 0
+
+    # Finance has no service, Expense/Impact have no keys at all
+    if service_id is None:
+        totals['giving_total'] = Finance.objects.filter(
+            date=day, parish_id=parish_id, ministry_id=ministry_id
+        ).aggregate(total=Sum('amount'))['total'] or 0
+
+        if parish_id is None and ministry_id is None:
+            totals['expense_total'] = Expense.objects.filter(date=day)\
+                .aggregate(total=Sum('amount'))['total'] or 0
+            totals['people_impacted'] = CommunityImpact.objects.filter(date=day)\
+                .aggregate(total=Sum('people_impacted'))['total'] or 0
+
+    return totals
+
+
+def _store(model, lookup, totals):
+    if any(totals.values()):
+        model.objects.update_or_create(defaults=totals, **lookup)
+    else:
+        model.objects.filter(**lookup).delete()
+
+
+def refresh_month(month, parish_id=None, ministry_id=None, service_id=None):
+    month = _as_date(month).replace(day=1)
+    keys = {'parish_id': parish_id, 'ministry_id': ministry_id, 'service_id': service_id}
+
+    agg = DailyRollup.objects.filter(date__gte=month, date__lt=_next_month(month), **keys)\
+        .aggregate(**{f: Sum(f) for f in METRIC_FIELDS})
+    totals = {f: agg[f] or 0 for f in METRIC_FIELDS}
+    _store(MonthlyRollup, dict(month=month, **keys), totals)
+
+
+@transaction.atomic
+def refresh_day(day, parish_id=None, ministry_id=None, service_id=None):
+    """Recompute one daily bucket from the source tables, then its month."""
+    day = _as_date(day)
+    totals = _day_totals(day, parish_id, ministry_id, service_id)
+    _store(DailyRollup, dict(date=day, parish_id=parish_id, ministry_id=ministry_id, service_id=service_id), totals)
+    refresh_month(day, parish_id, ministry_id, service_id)
+
+
+@transaction.atomic
+def rebuild_all(batch_size=1000):
+    """Drop and rebuild every rollup with one grouped query per source table."""
+    buckets = {}
+
+    def bucket(row, parish_id=None, ministry_id=None, service_id=None):
+        return buckets.setdefault((row['date'], parish_id, ministry_id, service_id), _empty_totals())
+
+    att_rows = Attendance.objects.values('date', 'parish_id', 'ministry_id', 'service_id')\
+        .annotate(total=Sum('total_count'), services=Count('id'), first_timers=Sum('first_timers_count'))\
+        .order_by()
+    for row in att_rows:
+        b = bucket(row, row['parish_id'], row['ministry_id'], row['service_id'])
+        b['attendance_total'] = row['total'] or 0
+        b['attendance_services'] = row['services']
+        b['first_timers'] = row['first_timers'] or 0
+
+    fin_rows = Finance.objects.values('date', 'parish_id', 'ministry_id').annotate(total=Sum('amount')).order_by()
+    for row in fin_rows:
+        bucket(row, row['parish_id'], row['ministry_id'])['giving_total'] = row['total'] or 0
+
+    for row in Expense.objects.values('date').annotate(total=Sum('amount')).order_by():
+        bucket(row)['expense_total'] = row['total'] or 0
+
+    for row in CommunityImpact.objects.values('date').annotate(total=Sum('people_impacted')).order_by():
+        bucket(row)['people_impacted'] = row['total'] or 0
+
+    DailyRollup.objects.all().delete()
+    MonthlyRollup.objects.all().delete()
+
+    DailyRollup.objects.bulk_create([
+        DailyRollup(date=d, parish_id=p, ministry_id=m, service_id=s, **totals)
+        for (d, p, m, s), totals in buckets.items()
+    ], batch_size=batch_size)
+
+    month_rows = DailyRollup.objects.annotate(month=TruncMonth('date'))\
+        .values('month', 'parish_id', 'ministry_id', 'service_id')\
+        .annotate(**{f'sum_{f}': Sum(f) for f in METRIC_FIELDS})\
+        .order_by()
+    monthly = [
+        MonthlyRollup(
+            month=row['month'], parish_id=row['parish_id'], ministry_id=row['ministry_id'], service_id=row['service_id'],
+            **{f: row[f'sum_{f}'] or 0 for f in METRIC_FIELDS}
+        )
+        for row in month_rows
+    ]
+    MonthlyRollup.objects.bulk_create(monthly, batch_size=batch_size)
+
+    return len(buckets), len(monthly)
+
+
+# --- Readers ---
+
+def totals_between(start=None, end=None):
+    """Summed daily metrics in [start, end]; `days` counts dates that had a service."""
+    qs = DailyRollup.objects.all()
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    # Aliases must not shadow the field names used in the `days` filter
+    agg = qs.aggregate(
+        **{f'sum_{f}': Sum(f) for f in METRIC_FIELDS},
+        days=Count('date', distinct=True, filter=Q(attendance_services__gt=0)),
+    )
+    totals = {f: agg[f'sum_{f}'] or 0 for f in METRIC_FIELDS}
+    totals['days'] = agg['days']
+    return totals
+
+
+def all_time_totals():
+    agg = MonthlyRollup.objects.aggregate(**{f: Sum(f) for f in METRIC_FIELDS})
+    return {k: v or 0 for k, v in agg.items()}
+
+
+def latest_attendance_date():
+    return DailyRollup.objects.filter(attendance_services__gt=0)\
+        .order_by('-date').values_list('date', flat=True).first()
+
+
+def monthly_series(*years):
+    """Jan-Dec attendance, giving and expense lists for each year, from one query."""
+    series = {
+        year: {'attendance': [0] * 12, 'giving': [0.0] * 12, 'expense': [0.0] * 12}
+        for year in years
+    }
+    rows = MonthlyRollup.objects.filter(month__year__in=years).values('month')\
+        .annotate(attendance=Sum('attendance_total'), giving=Sum('giving_total'), expense=Sum('expense_total'))\
+        .order_by()
+    for row in rows:
+        s = series[row['month'].year]
+        idx = row['month'].month - 1
+        s['attendance'][idx] = row['attendance'] or 0
+        s['giving'][idx] = float(row['giving'] or 0)
+        s['expense'][idx] = float(row['expense'] or 0)
+    return series
+
+
+def month_end(day):
+    return _next_month(day.replace(day=1)) - timedelta(days=1)
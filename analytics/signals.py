@@ -0,0 +1,118 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from operations.models import Attendance, MemberAttendance, Finance, Expense, CommunityImpact
+from people.models import Member
+from .rollups import refresh_day, rollup_key, rebuild_all, _as_date
+from .snapshots import invalidate_dates, invalidate_all
+
+ROLLUP_SOURCES = (Attendance, Finance, Expense, CommunityImpact)
+
+# Model -> field giving the day a row counts towards in the analytics period snapshots
+SNAPSHOT_SOURCES = {
+    Attendance: 'date',
+    Finance: 'date',
+    Expense: 'date',
+    Member: 'membership_date',
+}
+
+
+def snapshot_date(instance):
+    return _as_date(getattr(instance, SNAPSHOT_SOURCES[type(instance)]))
+
+
+def remember_previous_state(sender, instance, **kwargs):
+    # An edit can move a row to another day/parish, so the old bucket and windows need refreshing too
+    instance._rollup_previous_key = None
+    instance._snapshot_previous_date = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        if previous:
+            if sender in ROLLUP_SOURCES:
+                instance._rollup_previous_key = rollup_key(previous)
+            if sender in SNAPSHOT_SOURCES:
+                instance._snapshot_previous_date = snapshot_date(previous)
+
+
+def refresh_rollups(sender, instance, **kwargs):
+    keys = {rollup_key(instance)}
+    previous = getattr(instance, '_rollup_previous_key', None)
+    if previous:
+        keys.add(previous)
+    for key in keys:
+        refresh_day(*key)
+
+
+def invalidate_snapshots(sender, instance, **kwargs):
+    invalidate_dates(snapshot_date(instance), getattr(instance, '_snapshot_previous_date', None))
+
+
+def refresh_attendance(attendance):
+    """
+    Bring the rollup bucket and snapshots of a service up to date after its
+    headcounts were changed with update()/bulk_create, which send no signals.
+    """
+    refresh_day(*rollup_key(attendance))
+    invalidate_dates(attendance.date)
+
+
+def check_in_recorded(sender, instance, created, **kwargs):
+    # Check-ins only ever land on an existing service
+    if created:
+        attendance = Attendance.objects.filter(pk=instance.attendance_id).first()
+        if attendance:
+            refresh_attendance(attendance)
+
+
+def check_in_removed(sender, instance, **kwargs):
+    # operations.signals lowers checked_in_count on commit (operations is installed
+    # first, so its callback runs before this one). In a cascade from the Attendance
+    # delete the service is gone by then, and its own receivers cover it.
+    def refresh():
+        attendance = Attendance.objects.filter(pk=instance.attendance_id).first()
+        if attendance:
+            refresh_attendance(attendance)
+    transaction.on_commit(refresh)
+
+
+def _receivers():
+    for model in dict.fromkeys(ROLLUP_SOURCES + tuple(SNAPSHOT_SOURCES)):
+        yield pre_save, remember_previous_state, model, f'analytics_pre_save_{model.__name__}'
+    for model in ROLLUP_SOURCES:
+        yield post_save, refresh_rollups, model, f'rollup_post_save_{model.__name__}'
+        yield post_delete, refresh_rollups, model, f'rollup_post_delete_{model.__name__}'
+    for model in SNAPSHOT_SOURCES:
+        yield post_save, invalidate_snapshots, model, f'snapshot_post_save_{model.__name__}'
+        yield post_delete, invalidate_snapshots, model, f'snapshot_post_delete_{model.__name__}'
+    yield post_save, check_in_recorded, MemberAttendance, 'check_in_post_save_MemberAttendance'
+    yield post_delete, check_in_removed, MemberAttendance, 'check_in_post_delete_MemberAttendance'
+
+
+def connect():
+    for signal, receiver, model, uid in _receivers():
+        signal.connect(receiver, sender=model, dispatch_uid=uid)
+
+
+def disconnect():
+    for signal, receiver, model, uid in _receivers():
+        signal.disconnect(sender=model, dispatch_uid=uid)
+
+
+@contextmanager
+def bulk_load():
+    """
+    Mute the per-row receivers for mass deletes/inserts (seeding, imports) and
+    rebuild the rollups and drop every snapshot once at the end instead.
+    """
+    disconnect()
+    try:
+        yield
+    finally:
+        connect()
+        rebuild_all()
+        invalidate_all()
+
+
+connect()
@@ -0,0 +1,88 @@
+import hashlib
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+# Every snapshot key carries the generation of each month its window covers
+# (plus a global one). A write replaces the generation of its month, so the
+# snapshots over it are simply never looked up again: no shared index to
+# read-modify-write, nothing for concurrent workers to lose.
+GENERATION_PREFIX = 'analytics:snapshot:generation'
+GLOBAL_GENERATION_KEY = f'{GENERATION_PREFIX}:all'
+
+# Closed periods only change through invalidation; the finite timeout just lets
+# the superseded generations' entries age out of the cache
+CLOSED_PERIOD_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def _month_key(year, month):
+    return f'{GENERATION_PREFIX}:{year}-{month:02d}'
+
+
+def _months(start, end):
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _generations(keys):
+    """Current token of each generation key, creating the missing (or evicted) ones."""
+    tokens = cache.get_many(keys)
+    missing = [k for k in keys if k not in tokens]
+    for k in missing:
+        # add() keeps a token another worker created meanwhile
+        cache.add(k, uuid.uuid4().hex, None)
+    if missing:
+        tokens.update(cache.get_many(missing))
+    return [tokens.get(k, '') for k in keys]
+
+
+def snapshot_key(start, end, name=None):
+    keys = [GLOBAL_GENERATION_KEY] + [_month_key(y, m) for y, m in _months(start, end)]
+    generation = hashlib.sha1(':'.join(_generations(keys)).encode()).hexdigest()[:16]
+    if name:
+        return f'analytics:snapshot:{name}:{start.isoformat()}:{end.isoformat()}:{generation}'
+    return f'analytics:snapshot:{start.isoformat()}:{end.isoformat()}:{generation}'
+
+
+def _seconds_until_midnight():
+    now = timezone.localtime()
+    midnight = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), time.min))
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def get_period_snapshot(start, end, build, name=None):
+    """
+    Cached result of `build()` for the [start, end] window. Closed periods (ending
+    before today) are kept until a write inside the window invalidates them; open
+    ones also expire at midnight since the window moves with the date. `name`
+    keeps several snapshots of the same window apart.
+    """
+    key = snapshot_key(start, end, name)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build()
+        timeout = CLOSED_PERIOD_TIMEOUT if end < timezone.now().date() else _seconds_until_midnight()
+        cache.set(key, snapshot, timeout)
+    return snapshot
+
+
+def _bump(keys):
+    cache.set_many({k: uuid.uuid4().hex for k in keys}, None)
+
+
+def invalidate_dates(*dates):
+    """Retire every cached snapshot whose window contains one of `dates`."""
+    keys = {_month_key(d.year, d.month) for d in dates if d}
+    if keys:
+        # After commit, so a snapshot built meanwhile cannot be keyed on the new
+        # generation while still missing the write
+        transaction.on_commit(lambda: _bump(keys))
+
+
+def invalidate_all():
+    transaction.on_commit(lambda: _bump([GLOBAL_GENERATION_KEY]))
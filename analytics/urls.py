@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import AnalyticsDashboardView
+from .views import AnalyticsDashboardView, ParishPerformanceView, DemographicsView
 
 urlpatterns = [
     path('', AnalyticsDashboardView.as_view(), name='analytics-dashboard'),
+    path('parishes/', ParishPerformanceView.as_view(), name='parish-performance'),
+    path('demographics/', DemographicsView.as_view(), name='analytics-demographics'),
 ]
@@ -1,17 +1,38 @@
-from django.views.generic import TemplateView
+from django.views.generic import TemplateView, ListView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count, Sum, Avg
+from django.db.models import Sum, Avg, F
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from datetime import timedelta
+from django.http import JsonResponse
+from datetime import date, timedelta
 import json
 
 from people.models import Member
 from operations.models import Attendance, Finance, Expense
+from .demographics import demographics
+from .snapshots import get_period_snapshot
+from .parishes import parish_performance, order_by_param, as_row, SORT_FIELDS
+
+
+def add_month(d):
+    if d.month == 12: return d.replace(year=d.year+1, month=1)
+    return d.replace(month=d.month+1)
+
+
+def parse_as_of(request):
+    """Optional ?as_of=YYYY-MM-DD reference date for demographics (default today)."""
+    try:
+        return date.fromisoformat(request.GET.get('as_of', ''))
+    except ValueError:
+        return timezone.now().date()
+
 
 class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
     template_name = "analytics/dashboard.html"
 
+    def get_as_of(self):
+        return parse_as_of(self.request)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         today = timezone.now().date()
@@ -67,19 +88,37 @@ class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         context['total_members'] = Member.objects.count() # Always current
         context['total_families'] = Member.objects.filter(family__isnull=False).values('family').distinct().count()
         
+        # 2 & 3. Gender / Age Group Demographics
+        # Binned in the database in one grouped scan (see analytics.demographics)
+        demo = demographics(self.get_as_of())
+        context['chart_gender_labels'] = [label for label, _ in demo['gender']]
+        context['chart_gender_series'] = [count for _, count in demo['gender']]
+        context['chart_age_labels'] = [label for label, _ in demo['age_group']]
+        context['chart_age_series'] = [count for _, count in demo['age_group']]
+
+        # --- Period KPIs & Charts ---
+        # Cached per date window; invalidated when rows inside the window change
+        context.update(get_period_snapshot(
+            start_date, end_date, lambda: self.build_period_snapshot(start_date, end_date)
+        ))
+
+        return context
+
+    def build_period_snapshot(self, start_date, end_date):
+        snapshot = {}
+
         # Avg Attendance (In the selected period)
+        # checked_in_count is the maintained number of MemberAttendance rows
         avg_att = Attendance.objects.filter(
             date__gte=start_date, date__lte=end_date
-        ).annotate(
-            real_count=Count('details')
-        ).aggregate(avg=Avg('real_count'))['avg'] or 0
-        context['avg_attendance'] = round(avg_att)
+        ).aggregate(avg=Avg('checked_in_count'))['avg'] or 0
+        snapshot['avg_attendance'] = round(avg_att)
         
         # Income (Total in the selected period)
         total_income = Finance.objects.filter(
             date__gte=start_date, date__lte=end_date
         ).aggregate(total=Sum('amount'))['total'] or 0
-        context['total_income'] = total_income
+        snapshot['total_income'] = total_income
         
         # Calculate growth/trend if possible? (Simulated for now or based on previous period)
         # For simple removal of hardcoding, just showing the actual data for the period is enough.
@@ -90,9 +129,7 @@ class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
         # Filter by Range (Inclusive)
         attendance_records = Attendance.objects.filter(
             date__gte=start_date, date__lte=end_date
-        ).annotate(
-            real_count=Count('details')
-        ).values('date', 'real_count').order_by('date')
+        ).values('date', real_count=F('checked_in_count')).order_by('date')
         
         att_labels = []
         att_data = []
@@ -116,10 +153,6 @@ class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
             # Ensure we cover the full range of months in the interval
             end_curr = end_date.replace(day=1)
             
-            def add_month(d):
-                if d.month == 12: return d.replace(year=d.year+1, month=1)
-                return d.replace(month=d.month+1)
-            
             iter_date = curr
             while iter_date <= end_curr:
                  m_label = iter_date.strftime('%b %Y')
@@ -130,47 +163,14 @@ class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
                  
                  iter_date = add_month(iter_date)
             
-        context['chart_attendance_labels'] = att_labels
-        context['chart_attendance_data'] = att_data
-
-        # 2. Gender Demographics
-        gender_data = list(Member.objects.values('gender').annotate(count=Count('id')))
-        g_labels = [x['gender'] or 'Unknown' for x in gender_data]
-        g_series = [x['count'] for x in gender_data]
-        context['chart_gender_labels'] = g_labels
-        context['chart_gender_series'] = g_series
-
-        # 3. Age Group Demographics (Robust Enhancement)
-        # Using dob to calculate age groups
-        age_bins = {
-            '0-12 (Children)': 0,
-            '13-19 (Youth)': 0,
-            '20-35 (Young Adults)': 0,
-            '36-55 (Adults)': 0,
-            '56+ (Seniors)': 0,
-            'Unknown': 0
-        }
-        
-        all_members = Member.objects.all()
-        for m in all_members:
-            if m.dob:
-                age = (timezone.now().date() - m.dob).days // 365
-                if age <= 12: age_bins['0-12 (Children)'] += 1
-                elif age <= 19: age_bins['13-19 (Youth)'] += 1
-                elif age <= 35: age_bins['20-35 (Young Adults)'] += 1
-                elif age <= 55: age_bins['36-55 (Adults)'] += 1
-                else: age_bins['56+ (Seniors)'] += 1
-            else:
-                age_bins['Unknown'] += 1
-        
-        context['chart_age_labels'] = list(age_bins.keys())
-        context['chart_age_series'] = list(age_bins.values())
+        snapshot['chart_attendance_labels'] = att_labels
+        snapshot['chart_attendance_data'] = att_data
 
         # 4. Growth & First-Timers
         # New Members in the period
-        context['new_members'] = Member.objects.filter(membership_date__gte=start_date, membership_date__lte=end_date).count()
+        snapshot['new_members'] = Member.objects.filter(membership_date__gte=start_date, membership_date__lte=end_date).count()
         # First timers record from Attendance breakdown
-        context['total_first_timers'] = Attendance.objects.filter(date__gte=start_date, date__lte=end_date).aggregate(total=Sum('first_timers_count'))['total'] or 0
+        snapshot['total_first_timers'] = Attendance.objects.filter(date__gte=start_date, date__lte=end_date).aggregate(total=Sum('first_timers_count'))['total'] or 0
 
         # 5. Finance (Filtered)
         inc_monthly = Finance.objects.filter(date__gte=start_date, date__lte=end_date).annotate(
@@ -210,8 +210,51 @@ class AnalyticsDashboardView(LoginRequiredMixin, TemplateView):
             fin_income.append(f_map[lbl]['inc'])
             fin_expense.append(f_map[lbl]['exp'])
 
-        context['chart_finance_labels'] = fin_labels
-        context['chart_finance_income'] = fin_income
-        context['chart_finance_expense'] = fin_expense
+        snapshot['chart_finance_labels'] = fin_labels
+        snapshot['chart_finance_income'] = fin_income
+        snapshot['chart_finance_expense'] = fin_expense
+
+        return snapshot
+
+
+class ParishPerformanceView(LoginRequiredMixin, ListView):
+    """All-parishes league table (returns & membership), sortable and paginated in SQL."""
+    template_name = "analytics/parish_performance.html"
+    context_object_name = "parishes"
+    paginate_by = 20
+
+    def get_year(self):
+        # The current year unless ?year= is a year a date can hold, previous year included
+        current = timezone.now().year
+        try:
+            year = int(self.request.GET.get('year', current))
+        except ValueError:
+            return current
+        return year if date.min.year + 1 <= year <= date.max.year else current
 
+    def get_queryset(self):
+        return order_by_param(parish_performance(self.get_year()), self.request.GET.get('sort', '-returns'))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        year = self.get_year()
+        context['rows'] = [as_row(p) for p in context['parishes']]
+        context['year'] = year
+        context['prev_year'] = year - 1
+        sort = self.request.GET.get('sort', '-returns')
+        context['sort'] = sort
+        # Clicking a header toggles between descending and ascending
+        context['sort_links'] = {key: (key if sort == f'-{key}' else f'-{key}') for key in SORT_FIELDS}
         return context
+
+
+class DemographicsView(LoginRequiredMixin, View):
+    """JSON breakdowns (age, gender, marital status, member type, city) as of ?as_of=."""
+
+    def get(self, request):
+        as_of = parse_as_of(request)
+        demo = demographics(as_of)
+        return JsonResponse({
+            'as_of': as_of.isoformat(),
+            **{dim: [{'name': label, 'value': count} for label, count in rows] for dim, rows in demo.items()},
+        })
@@ -44,16 +44,20 @@ INSTALLED_APPS = [
     'analytics',
     'outreach',
     'employees',
+    'search',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # Add this right here after SecurityMiddleware
+    'core.middleware.TracingMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -83,9 +87,61 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts and wait for it, so
+            # concurrent check-ins queue up instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Request metrics (core.metrics): each worker writes its totals to METRICS_DIR,
+# which must be shared by all workers; scrapers authenticate with METRICS_TOKEN
+METRICS_DIR = os.getenv('METRICS_DIR', str(BASE_DIR / '.metrics'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_FLUSH_SECONDS = 10
+
+# Slow-query log (core.slow_queries): statements over SLOW_QUERY_MS, rotated by size
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', str(BASE_DIR / 'logs' / 'slow_queries.log'))
+SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+
+# On-demand profiles (core.profiling): super admins add ?profile=1 to a request
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(BASE_DIR / 'logs' / 'profiles'))
+PROFILE_KEEP = 50
+
+# OpenTelemetry tracing (core.tracing): none (default), console, file or otlp
+TRACING_EXPORTER = os.getenv('OTEL_TRACES_EXPORTER', 'none')
+TRACING_FILE = os.getenv('TRACING_FILE', str(BASE_DIR / 'logs' / 'traces.jsonl'))
+
+# Cache (analytics snapshots, the stats/finance day caches). Invalidation has to
+# reach every gunicorn worker, so the default is the database cache (startup.sh
+# runs `manage.py createcachetable`); 'file' also works across workers on one
+# host. 'locmem' is per-process: only for a single-process runserver.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'database')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+        }
+    }
+elif CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
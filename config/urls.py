@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from core.views import (
     DashboardView, AdminDashboardView, AdminUserListView,
-    AdminParishListView, AdminMinistryListView, AdminAuditLogView
+    AdminParishListView, AdminMinistryListView, AdminAuditLogView, AdminSlowQueryView, MetricsView,
+    AdminProfileListView, AdminProfileDetailView, AdminProfileDownloadView
 )
 from django.views.generic import RedirectView
 
@@ -17,6 +18,11 @@ urlpatterns = [
     path('admin-panel/parishes/', AdminParishListView.as_view(), name='admin-parish-list'),
     path('admin-panel/ministries/', AdminMinistryListView.as_view(), name='admin-ministry-list'),
     path('admin-panel/audit-logs/', AdminAuditLogView.as_view(), name='admin-audit-logs'),
+    path('admin-panel/slow-queries/', AdminSlowQueryView.as_view(), name='admin-slow-queries'),
+    path('admin-panel/profiles/', AdminProfileListView.as_view(), name='admin-profiles'),
+    path('admin-panel/profiles/<str:profile_id>/', AdminProfileDetailView.as_view(), name='admin-profile-detail'),
+    path('admin-panel/profiles/<str:profile_id>/download/', AdminProfileDownloadView.as_view(), name='admin-profile-download'),
+    path('admin-panel/metrics/', MetricsView.as_view(), name='admin-metrics'),
 
     path('people/', include('people.urls')),
     path('events/', include('events.urls')),
@@ -25,6 +31,7 @@ urlpatterns = [
     path('attendance/', include('operations.urls')),
     path('outreach/', include('outreach.urls')),
     path('employees/', include('employees.urls')),
+    path('search/', include('search.urls')),
     path('finance/analytics/', RedirectView.as_view(url='/analytics/', permanent=True)),
     path('finance/', include('operations.urls')),
 ]
@@ -6,3 +6,5 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.signals
+        from core import tracing
+        tracing.configure()
@@ -0,0 +1,153 @@
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from core.models import User
+from people.models import Member
+from operations.models import Attendance, MemberAttendance, Finance, Expense
+
+# (result key, url name) of the pages under test
+PAGES = (
+    ('dashboard', 'dashboard'),
+    ('analytics', 'analytics-dashboard'),
+    ('ledger', 'financial-ledger'),
+    ('member_list', 'member-list'),
+    ('attendance_list', 'attendance-list'),
+    ('member_stats_api', 'api-member-stats'),
+)
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throwaway test database through seed_db/seed_history and times the hottest pages '
+            '(query count, wall time, peak memory), writing the results to JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=5000, help='Members created by seed_db (default 5000)')
+        parser.add_argument('--years', type=int, default=3, help='Years of history from seed_history (default 3)')
+        parser.add_argument('--checkins', type=int, help='Check-ins per service (default: seed_history\'s 60%% of headcount)')
+        parser.add_argument('--logs', type=int, default=10000, help='Audit log rows created by seed_db (default 10000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Warm requests per page (default 5)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, so runs build the same dataset')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the results')
+        parser.add_argument('--compare', help='Earlier results file to print deltas against')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        # Never touch the real database: seeding wipes the tables it fills
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as fh:
+            json.dump(results, fh, indent=2)
+        self.report(results, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run(self, options):
+        random.seed(options['seed'])
+        Faker.seed(options['seed'])
+
+        self.stdout.write('Seeding benchmark dataset...')
+        started = time.perf_counter()
+        call_command('seed_db', members=options['members'], logs=options['logs'], stdout=self.stdout)
+        call_command('seed_history', years=options['years'], checkins=options['checkins'], stdout=self.stdout)
+        seed_seconds = time.perf_counter() - started
+
+        client = Client()
+        client.force_login(User.objects.filter(role_id=1).first())
+
+        pages = {}
+        for key, url_name in PAGES:
+            self.stdout.write(f'Timing {key}...')
+            pages[key] = self.measure(client, reverse(url_name), options['repeat'])
+
+        return {
+            'run_at': timezone.now().isoformat(),
+            'scale': {k: options[k] for k in ('members', 'years', 'checkins', 'logs', 'repeat', 'seed')},
+            'seed_seconds': round(seed_seconds, 1),
+            'dataset': {
+                'members': Member.objects.count(),
+                'attendances': Attendance.objects.count(),
+                'check_ins': MemberAttendance.objects.count(),
+                'finances': Finance.objects.count(),
+                'expenses': Expense.objects.count(),
+            },
+            'pages': pages,
+        }
+
+    def measure(self, client, url, repeat):
+        # Cold: empty cache (analytics snapshots etc.). The query log is a bounded
+        # deque that seeding may have filled, so empty it before counting. Each
+        # count is read as its block exits: the next request's request_started
+        # signal runs reset_queries(), which empties what the context captured.
+        cache.clear()
+        reset_queries()
+        with CaptureQueriesContext(connection) as cold_queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            cold_ms = (time.perf_counter() - started) * 1000
+        queries_cold = len(cold_queries)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned {response.status_code}')
+
+        warm = []
+        # Queries of each warm request, in order
+        queries_warm = []
+        for _ in range(repeat):
+            reset_queries()
+            with CaptureQueriesContext(connection) as warm_queries:
+                started = time.perf_counter()
+                client.get(url)
+                warm.append((time.perf_counter() - started) * 1000)
+            queries_warm.append(len(warm_queries))
+
+        # Separate request: tracemalloc slows everything down, so it is kept out of the timings
+        tracemalloc.start()
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'url': url,
+            'queries_cold': queries_cold,
+            'queries_warm': queries_warm,
+            'ms_cold': round(cold_ms, 1),
+            'ms_median': round(statistics.median(warm), 1) if warm else None,
+            'ms_min': round(min(warm), 1) if warm else None,
+            'peak_kb': round(peak / 1024),
+        }
+
+    def report(self, results, baseline=None):
+        before = (baseline or {}).get('pages', {})
+        self.stdout.write(f"\n{'page':<18}{'queries':>9}{'warm q':>9}{'cold ms':>10}{'median ms':>11}{'peak KB':>10}")
+        for key, page in results['pages'].items():
+            warm = page['queries_warm']
+            warm_text = '-' if not warm else str(warm[0]) if min(warm) == max(warm) else f'{min(warm)}-{max(warm)}'
+            line = f"{key:<18}{page['queries_cold']:>9}{warm_text:>9}{page['ms_cold']:>10}{page['ms_median'] or '-':>11}{page['peak_kb']:>10}"
+            if key in before and before[key].get('ms_median') and page['ms_median']:
+                change = (page['ms_median'] - before[key]['ms_median']) / before[key]['ms_median'] * 100
+                line += f"   {change:+.0f}% median, {page['queries_cold'] - before[key]['queries_cold']:+d} queries"
+            self.stdout.write(line)
@@ -0,0 +1,153 @@
+import os
+import re
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from core.models import User, UserLoginLog
+from core.profiling import QueryRecorder
+from events.models import Event
+from operations.models import Attendance, MemberAttendance, Finance, Expense, AuditLog
+from people.models import Member
+
+# Tables that grow with the congregation's history; a full scan of one of these is a bug
+LARGE_MODELS = (Member, Attendance, MemberAttendance, Finance, Expense, UserLoginLog, AuditLog, Event)
+
+# Url names of the main views whose queries are checked
+VIEWS = (
+    'dashboard',
+    'analytics-dashboard',
+    'parish-performance',
+    'analytics-demographics',
+    'financial-dashboard',
+    'financial-income-list',
+    'financial-expense-list',
+    'financial-ledger',
+    'financial-reports',
+    'member-list',
+    'member-portal',
+    'attendance-list',
+    'event-list',
+    'admin-audit-logs',
+    'api-member-list',
+    'api-member-stats',
+)
+
+# Call sites (file, function) whose full scans are deliberate, with the reason
+ALLOWED_SCANS = {
+    ('analytics/demographics.py', 'demographics'): 'whole-congregation breakdown, one grouped pass over every member',
+    ('people/stats.py', '_cards'): 'member list counters, one conditional-aggregation pass, cached for the day',
+    ('people/stats.py', '_charts'): 'member chart distributions, one grouped pass, cached for the day',
+    ('operations/stats.py', '_recent'): 'last services of every kind, one window pass over all services, cached for the day',
+}
+
+# SQLite's plan line for reading a whole table without an index, e.g. "SCAN people_member"
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+# Django's table aliases in joins/subqueries: FROM "people_member" U0, INNER JOIN "..." T3
+TABLE_ALIAS = re.compile(r'(?:FROM|JOIN)\s+"(\w+)"\s+([A-Z]\d+)\b')
+# An unfiltered page in primary-key order: the scan walks the rowid b-tree and stops at LIMIT
+PK_ORDER_PAGE = re.compile(r'^SELECT (?:(?! WHERE ).)* ORDER BY "\w+"\."id" (?:ASC|DESC) LIMIT \d+(?: OFFSET \d+)?$')
+
+
+class Command(BaseCommand):
+    help = ('Runs the main views against a small seeded test database, EXPLAINs every SELECT they issue '
+            'and fails if any of them reads one of the large tables with a full table scan')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=200, help='Members created by seed_db (default 200)')
+        parser.add_argument('--years', type=int, default=1, help='Years of history from seed_history (default 1)')
+        parser.add_argument('--show-plans', action='store_true', help='Print the plan of every query, not just the failures')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('check_query_plans reads SQLite\'s EXPLAIN QUERY PLAN output; run it on SQLite.')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command('seed_db', members=options['members'], logs=options['members'], stdout=self.stdout)
+            call_command('seed_history', years=options['years'], stdout=self.stdout)
+            queries = self.capture()
+            failures = self.check_plans(queries, options['show_plans'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f'{failures} quer{"y" if failures == 1 else "ies"} fell back to a full table scan.')
+        self.stdout.write(self.style.SUCCESS(f'{len(queries)} distinct queries over {len(VIEWS)} views, no full table scans.'))
+
+    def capture(self):
+        """(view, sql, frame) of every distinct SELECT issued by VIEWS."""
+        admin = User.objects.filter(role_id=1).first()
+        # The member portal looks the signed-in user's member record up by email
+        Member.objects.filter(pk=Member.objects.order_by('pk').values('pk')[:1]).update(email=admin.email)
+        client = Client()
+        client.force_login(admin)
+
+        seen = set()
+        queries = []
+        for url_name in VIEWS:
+            cache.clear()
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                response = client.get(reverse(url_name))
+            if response.status_code != 200:
+                raise CommandError(f'{url_name} returned {response.status_code}')
+            for query in recorder.queries:
+                sql = query['sql']
+                if sql.lstrip().upper().startswith('SELECT') and sql not in seen:
+                    seen.add(sql)
+                    frame = query['frame']
+                    if not frame or os.path.basename(__file__) in frame:
+                        # Evaluated by the template or paginator, below any view code
+                        frame = 'template/pagination'
+                    queries.append((url_name, sql, frame))
+        return queries
+
+    def check_plans(self, queries, show_plans):
+        large_tables = {model._meta.db_table for model in LARGE_MODELS}
+        failures = 0
+        with connection.cursor() as cursor:
+            for url_name, sql, frame in queries:
+                # Plans do not depend on the parameter values, so NULLs stand in for them
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', [None] * sql.count('%s'))
+                plan = [row[3] for row in cursor.fetchall()]
+                scanned = full_scans(sql, plan) & large_tables
+                if scanned and _call_site(frame) in ALLOWED_SCANS:
+                    if show_plans:
+                        self.stdout.write(f'{url_name}: allowed scan ({ALLOWED_SCANS[_call_site(frame)]}): {sql}')
+                    continue
+
+                if scanned:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f"{url_name}: full scan of {', '.join(sorted(scanned))}"))
+                    self.stdout.write(f'  from {frame}\n  {sql}')
+                elif show_plans:
+                    self.stdout.write(f'{url_name}: {sql}')
+                if scanned or show_plans:
+                    for line in plan:
+                        self.stdout.write(f'    {line}')
+        return failures
+
+
+def _call_site(frame):
+    """('analytics/demographics.py', 'demographics') from 'analytics/demographics.py:55 in demographics'."""
+    location, _, function = frame.partition(' in ')
+    return location.rsplit(':', 1)[0], function
+
+
+def full_scans(sql, plan):
+    """Tables the plan reads row by row without an index."""
+    if PK_ORDER_PAGE.match(sql) and not any(line.startswith('USE TEMP B-TREE') for line in plan):
+        return set()
+    aliases = {alias: table for table, alias in TABLE_ALIAS.findall(sql)}
+    return {
+        aliases.get(match.group(1), match.group(1))
+        for match in map(FULL_SCAN.match, plan) if match
+    }
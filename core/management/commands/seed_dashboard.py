@@ -54,11 +54,13 @@ class Command(BaseCommand):
                 # But Attendance requires Event FK? No, looks like it's optional or we can reuse one
                 # Checking model: event can be null.
                 
-                Attendance.objects.create(
+                # One record per service per day (unique_adhoc_service_attendance): re-runs keep it
+                Attendance.objects.get_or_create(
                     date=sunday,
                     service_type=svc_name,
-                    total_count=count,
-                    first_timers_count=random.randint(1, 10)
+                    service=None,
+                    parish=None,
+                    defaults=dict(total_count=count, first_timers_count=random.randint(1, 10)),
                 )
         
         self.stdout.write("- Created Attendance Trend records")
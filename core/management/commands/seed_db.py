@@ -1,6 +1,10 @@
 import random
 from datetime import timedelta, date, timezone
 from django.core.management.base import BaseCommand
+from analytics.signals import bulk_load
+from search import signals as search_signals
+from people import signals as people_signals
+from operations import signals as operations_signals
 from django.utils import timezone as django_timezone
 from faker import Faker
 from core.models import User
@@ -13,7 +17,17 @@ fake = Faker()
 class Command(BaseCommand):
     help = 'Seeds database with large scale data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=5000, help='Number of members (default 5000)')
+        parser.add_argument('--attendances', type=int, default=5000, help='Number of attendance summaries (default 5000)')
+        parser.add_argument('--logs', type=int, default=150000, help='Number of audit log rows (default 150000)')
+
     def handle(self, *args, **options):
+        # Per-row rollup/snapshot/search-index/stats signals are muted; each is rebuilt once at the end
+        with bulk_load(), search_signals.bulk_load(), people_signals.bulk_load(), operations_signals.bulk_load():
+            self.seed(options['members'], options['attendances'], options['logs'])
+
+    def seed(self, member_total, attendance_total, log_total):
         self.stdout.write('🌱 Seeding database...')
         
         # 1. Clear Data
@@ -74,10 +88,10 @@ class Command(BaseCommand):
             u.save()
         all_users = list(User.objects.all())
 
-        # 5. Members (5000)
-        self.stdout.write('Seeding 5000 members...')
+        # 5. Members (5000 by default)
+        self.stdout.write(f'Seeding {member_total} members...')
         members = []
-        for _ in range(5000):
+        for _ in range(member_total):
             members.append(Member(
                 first_name=fake.first_name(),
                 last_name=fake.last_name(),
@@ -108,10 +122,10 @@ class Command(BaseCommand):
         Event.objects.bulk_create(events)
         all_events = list(Event.objects.all())
 
-        # 7. Attendance (5000 summaries)
+        # 7. Attendance (5000 summaries by default)
         self.stdout.write('Seeding Attendance...')
         attendances = []
-        for _ in range(5000):
+        for _ in range(attendance_total):
             attendances.append(Attendance(
                 date=fake.date_between(start_date='-5y', end_date='today'),
                 service_type='Sunday Service',
@@ -122,10 +136,10 @@ class Command(BaseCommand):
             ))
         Attendance.objects.bulk_create(attendances, batch_size=1000)
         
-        # 8. Audit Logs (150k)
-        self.stdout.write('Seeding 150k Logs (this may take a moment)...')
+        # 8. Audit Logs (150k by default)
+        self.stdout.write(f'Seeding {log_total} Logs (this may take a moment)...')
         logs = []
-        for _ in range(150000):
+        for _ in range(log_total):
             logs.append(AuditLog(
                 user=random.choice(all_users),
                 action=random.choice(['LOGIN', 'UPDATE', 'CREATE', 'DELETE']),
@@ -1,25 +1,42 @@
 from django.core.management.base import BaseCommand
+from analytics.signals import bulk_load
+from search import signals as search_signals
+from people import signals as people_signals
+from operations import signals as operations_signals
 from django.utils import timezone
 from datetime import timedelta, date
 import random
 from people.models import Member
 from operations.models import Attendance, Finance, MemberAttendance, Expense
+from operations.checkins import recount_check_ins
 from ministry.models import Ministry, Parish
 
 class Command(BaseCommand):
     help = 'Seeds historical data (Attendance & Finance)'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, help='Seed the last N calendar years up to today instead of 2020-2025')
+        parser.add_argument('--checkins', type=int, help='MemberAttendance rows per service (default 60%% of its headcount)')
+
     def handle(self, *args, **kwargs):
+        # Per-row rollup/snapshot/search-index/stats signals are muted; each is rebuilt once at the end
+        with bulk_load(), search_signals.bulk_load(), people_signals.bulk_load(), operations_signals.bulk_load():
+            self.seed(kwargs['years'], kwargs['checkins'])
+
+    def seed(self, years=None, checkins=None):
         self.stdout.write("Cleaning up old data...")
         Attendance.objects.all().delete() # Cascades to MemberAttendance
         Finance.objects.all().delete()
         Expense.objects.all().delete()
         # Member.objects.all().delete() # Optional: Keep members
         
-        self.stdout.write(f"Starting historical data seed (2020-2025)...")
-
         start_date = date(2020, 1, 1)
         end_date = date(2025, 12, 31)
+        if years:
+            end_date = timezone.now().date()
+            start_date = date(end_date.year - years + 1, 1, 1)
+
+        self.stdout.write(f"Starting historical data seed ({start_date.year}-{end_date.year})...")
         
         
         # Ensure we have members to reuse
@@ -93,7 +110,8 @@ class Command(BaseCommand):
                     first_timers_count=random.randint(0, 5)
                 )
 
-                present_members = random.sample(all_members, k=min(len(all_members), int(total_count * 0.6)))
+                present = checkins if checkins is not None else int(total_count * 0.6)
+                present_members = random.sample(all_members, k=min(len(all_members), present))
                 
                 for mem in present_members:
                     member_attendance_buffer.append(MemberAttendance(
@@ -189,6 +207,8 @@ class Command(BaseCommand):
         # Final batch
         if member_attendance_buffer:
             MemberAttendance.objects.bulk_create(member_attendance_buffer)
+        # bulk_create skips MemberAttendance.save, so set the headcounts in one pass
+        recount_check_ins()
         if finance_buffer:
             Finance.objects.bulk_create(finance_buffer)
         if expense_buffer:
@@ -0,0 +1,234 @@
+"""
+Per-view request/SQL metrics, aggregated in-process and shared between
+gunicorn workers through one JSON file per worker in METRICS_DIR (the
+endpoint merges them), rendered in the Prometheus text format. The files of
+workers that have exited are folded into a live worker's totals, so the
+directory holds about one file per running worker.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from . import slow_queries
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Label for requests that did not resolve to a named URL (404s, unnamed patterns)
+UNRESOLVED = '<unresolved>'
+
+
+class QueryTimer:
+    """
+    connection.execute_wrapper hook counting statements and the time spent running
+    them; statements over SLOW_QUERY_MS also go to the slow-query log.
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+                slow_queries.record(sql, params, elapsed * 1000, self.request)
+
+
+def _empty_series():
+    return {
+        'statuses': {},
+        'buckets': [0] * len(LATENCY_BUCKETS),
+        'count': 0,
+        'seconds': 0.0,
+        'sql_count': 0,
+        'sql_seconds': 0.0,
+    }
+
+
+class Registry:
+    """This worker's cumulative totals, keyed by 'view|method'."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.last_flush = 0.0
+        self.filename = f'{os.getpid()}-{int(time.time())}.json'
+
+    def observe(self, view, method, status, seconds, sql_count, sql_seconds):
+        status_class = f'{status // 100}xx'
+        with self.lock:
+            series = self.series.setdefault(f'{view}|{method}', _empty_series())
+            series['statuses'][status_class] = series['statuses'].get(status_class, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series['buckets'][i] += 1
+            series['count'] += 1
+            series['seconds'] += seconds
+            series['sql_count'] += sql_count
+            series['sql_seconds'] += sql_seconds
+        self.flush()
+
+    def absorb(self, worker):
+        """Add another worker's totals (from its file) to this worker's."""
+        with self.lock:
+            for key, series in worker.items():
+                _add(self.series.setdefault(key, _empty_series()), series)
+
+    def flush(self, force=False):
+        """Write the totals to this worker's file, at most every METRICS_FLUSH_SECONDS."""
+        now = time.monotonic()
+        if not force and now - self.last_flush < settings.METRICS_FLUSH_SECONDS:
+            return
+        self.last_flush = now
+        with self.lock:
+            if not self.series:
+                # Nothing observed (e.g. a management command): leave no file behind
+                return
+            payload = json.dumps(self.series)
+        path = os.path.join(settings.METRICS_DIR, self.filename)
+        try:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            tmp = f'{path}.tmp'
+            with open(tmp, 'w') as fh:
+                fh.write(payload)
+            os.replace(tmp, path)
+        except OSError:
+            # Metrics must never take a request down with them
+            pass
+
+
+def _add(total, series):
+    for status_class, n in series['statuses'].items():
+        total['statuses'][status_class] = total['statuses'].get(status_class, 0) + n
+    total['buckets'] = [a + b for a, b in zip(total['buckets'], series['buckets'])]
+    for field in ('count', 'seconds', 'sql_count', 'sql_seconds'):
+        total[field] += series[field]
+
+
+registry = Registry()
+# Up to METRICS_FLUSH_SECONDS of samples would otherwise be lost on every shutdown
+atexit.register(registry.flush, force=True)
+
+
+def _exited(filename):
+    """Whether the worker that wrote `filename` ('<pid>-<started>.json') is gone."""
+    if filename == registry.filename:
+        return False
+    try:
+        pid = int(filename.split('-', 1)[0])
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        # An earlier process that had this pid
+        return True
+    if os.name != 'posix':
+        # os.kill(pid, 0) only probes on POSIX; elsewhere keep every file
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+def _absorb_exited():
+    """
+    Fold the files of exited workers into this worker's totals and delete them.
+    Renaming a file first claims it, so concurrent scrapes never count it twice.
+    """
+    claimed = []
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        if not _exited(os.path.basename(path)):
+            continue
+        claim = f'{path}.{os.getpid()}.absorbing'
+        try:
+            os.rename(path, claim)
+        except OSError:
+            # Another worker claimed it first
+            continue
+        claimed.append(claim)
+        try:
+            with open(claim) as fh:
+                registry.absorb(json.load(fh))
+        except (OSError, ValueError):
+            pass
+    if claimed:
+        # The totals are in this worker's file before the claimed copies go
+        registry.flush(force=True)
+        for claim in claimed:
+            try:
+                os.remove(claim)
+            except OSError:
+                pass
+
+
+def collect():
+    """Totals of every worker (including ones that have since exited), merged."""
+    registry.flush(force=True)
+    _absorb_exited()
+    merged = {}
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.json')):
+        try:
+            with open(path) as fh:
+                worker = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for key, series in worker.items():
+            _add(merged.setdefault(key, _empty_series()), series)
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def render(merged):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+
+    def header(name, kind, text):
+        lines.append(f'# HELP {name} {text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+    items = sorted(tuple(key.split('|', 1)) + (series,) for key, series in merged.items())
+
+    header('http_requests_total', 'counter', 'Requests handled, by view, method and status class.')
+    for view, method, series in items:
+        for status_class, n in sorted(series['statuses'].items()):
+            lines.append(f'http_requests_total{{{_labels(view=view, method=method, status=status_class)}}} {n}')
+
+    header('http_request_duration_seconds', 'histogram', 'Request latency, by view and method.')
+    for view, method, series in items:
+        for bound, n in zip(LATENCY_BUCKETS, series['buckets']):
+            lines.append(f'http_request_duration_seconds_bucket{{{_labels(view=view, method=method, le=bound)}}} {n}')
+        lines.append(f'http_request_duration_seconds_bucket{{{_labels(view=view, method=method, le="+Inf")}}} {series["count"]}')
+        lines.append(f'http_request_duration_seconds_sum{{{_labels(view=view, method=method)}}} {series["seconds"]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{{_labels(view=view, method=method)}}} {series["count"]}')
+
+    header('db_queries_total', 'counter', 'SQL statements executed while handling requests, by view and method.')
+    for view, method, series in items:
+        lines.append(f'db_queries_total{{{_labels(view=view, method=method)}}} {series["sql_count"]}')
+
+    header('db_query_duration_seconds_total', 'counter', 'Time spent in SQL while handling requests, by view and method.')
+    for view, method, series in items:
+        lines.append(f'db_query_duration_seconds_total{{{_labels(view=view, method=method)}}} {series["sql_seconds"]:.6f}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,54 @@
+import time
+
+from django.db import connection
+
+from .metrics import QueryTimer, registry, UNRESOLVED
+from .profiling import wants_profile, profile_request
+from . import tracing
+
+
+class MetricsMiddleware:
+    """
+    Records per-view request counts, latency and SQL count/time (through
+    connection.execute_wrapper) into core.metrics, and slow statements into
+    core.slow_queries. Sits after WhiteNoise so static files are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer(request)
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else UNRESOLVED
+        registry.observe(view, request.method, response.status_code, elapsed, timer.count, timer.seconds)
+        return response
+
+
+class ProfilerMiddleware:
+    """Runs super admins' ?profile=1 requests under cProfile (see core.profiling). Needs request.user."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if wants_profile(request):
+            return profile_request(request, self.get_response)
+        return self.get_response(request)
+
+
+class TracingMiddleware:
+    """Request/SQL/template spans when OpenTelemetry tracing is configured (see core.tracing)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if tracing.tracer is None:
+            return self.get_response(request)
+        return tracing.trace_request(request, self.get_response)
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_userloginlog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userloginlog',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='login_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='userloginlog',
+            index=models.Index(fields=['user', '-login_datetime'], name='login_user_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userloginlog',
+            index=models.Index(fields=['-login_datetime'], name='login_datetime_idx'),
+        ),
+    ]
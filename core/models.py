@@ -37,7 +37,8 @@ class User(AbstractUser):
         return self.username
 
 class UserLoginLog(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_logs')
+    # Indexed through login_user_datetime_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='login_logs', db_index=False)
     login_datetime = models.DateTimeField(auto_now_add=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
@@ -45,6 +46,10 @@ class UserLoginLog(models.Model):
 
     class Meta:
         ordering = ['-login_datetime']
+        indexes = [
+            models.Index(fields=['user', '-login_datetime'], name='login_user_datetime_idx'),
+            models.Index(fields=['-login_datetime'], name='login_datetime_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} logged in at {self.login_datetime}"
@@ -0,0 +1,149 @@
+"""
+On-demand request profiling for super admins: add ?profile=1 (or send the
+header `X-Profile: 1`) and the request runs under cProfile. The profile (pstats
+dump, loadable in snakeviz etc.) is kept in PROFILE_DIR next to a JSON summary
+with the request's SQL, and both are browsable from the admin panel.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .slow_queries import app_frame
+
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+PROFILE_ID = re.compile(r'^[0-9a-f]{12}$')
+
+
+def wants_profile(request):
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated and user.role_id == 1):
+        return False
+    return request.GET.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+class QueryRecorder:
+    """execute_wrapper hook keeping every statement of the profiled request."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params)[:500],
+                'ms': round((time.perf_counter() - started) * 1000, 2),
+                'frame': app_frame(),
+            })
+
+
+def _path(profile_id, ext):
+    return os.path.join(settings.PROFILE_DIR, f'{profile_id}.{ext}')
+
+
+def profile_request(request, get_response):
+    """Run get_response(request) under cProfile and store the result; returns the response."""
+    profiler = cProfile.Profile()
+    recorder = QueryRecorder()
+    started = time.perf_counter()
+    with connection.execute_wrapper(recorder):
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    profile_id = uuid.uuid4().hex[:12]
+    match = request.resolver_match
+    summary = {
+        'id': profile_id,
+        'at': timezone.now().isoformat(),
+        'path': request.get_full_path(),
+        'method': request.method,
+        'view': match.url_name if match else None,
+        'user': request.user.get_username(),
+        'status': response.status_code,
+        'ms': round(elapsed_ms, 1),
+        'sql_ms': round(sum(q['ms'] for q in recorder.queries), 1),
+        'queries': recorder.queries,
+    }
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(_path(profile_id, 'prof'))
+    with open(_path(profile_id, 'json'), 'w') as fh:
+        json.dump(summary, fh)
+    _prune()
+
+    response['X-Profile-Id'] = profile_id
+    return response
+
+
+def _prune():
+    """Keep only the newest PROFILE_KEEP profiles."""
+    summaries = sorted(
+        (p for p in os.listdir(settings.PROFILE_DIR) if p.endswith('.json')),
+        key=lambda p: os.path.getmtime(os.path.join(settings.PROFILE_DIR, p)),
+        reverse=True,
+    )
+    for name in summaries[settings.PROFILE_KEEP:]:
+        for ext in ('json', 'prof'):
+            try:
+                os.remove(_path(name[:-5], ext))
+            except OSError:
+                pass
+
+
+def list_profiles():
+    """Summaries (without the query list) of the stored profiles, newest first."""
+    profiles = []
+    try:
+        names = os.listdir(settings.PROFILE_DIR)
+    except OSError:
+        return profiles
+    for name in names:
+        if name.endswith('.json'):
+            summary = load(name[:-5])
+            if summary:
+                summary['query_count'] = len(summary.pop('queries'))
+                profiles.append(summary)
+    return sorted(profiles, key=lambda p: p['at'], reverse=True)
+
+
+def load(profile_id):
+    if not PROFILE_ID.match(profile_id or ''):
+        return None
+    try:
+        with open(_path(profile_id, 'json')) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def stats_path(profile_id):
+    if not PROFILE_ID.match(profile_id or ''):
+        return None
+    path = _path(profile_id, 'prof')
+    return path if os.path.exists(path) else None
+
+
+def stats_text(profile_id, sort='cumulative', limit=60):
+    """pstats report of a stored profile, project paths shortened."""
+    path = stats_path(profile_id)
+    if not path:
+        return ''
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.sort_stats(sort if sort in SORT_KEYS else 'cumulative').print_stats(limit)
+    return stream.getvalue().replace(str(settings.BASE_DIR) + os.sep, '')
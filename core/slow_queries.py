@@ -0,0 +1,145 @@
+"""
+Slow-query log: statements slower than SLOW_QUERY_MS are appended (one JSON
+object per line) to a size-rotated file, with the view and the application
+frame that issued them. A file rather than a table so that recording never
+issues SQL of its own from inside the execute wrapper.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import traceback
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('core.slow_queries')
+logger.propagate = False
+_setup_lock = threading.Lock()
+
+# Frames from these modules are the instrumentation itself (each wraps or
+# records execute), not the caller; matched by full path, not bare file name
+_OWN_MODULES = ('core.slow_queries', 'core.metrics', 'core.middleware', 'core.profiling', 'core.tracing')
+_OWN_FILES = frozenset(module.replace('.', os.sep) + '.py' for module in _OWN_MODULES)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL with literals/placeholders replaced by ? and IN lists collapsed, for grouping."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def app_frame():
+    """Innermost stack frame in project code, e.g. 'core/views.py:212 in get_context_data'."""
+    base = str(settings.BASE_DIR) + os.sep
+    for frame in reversed(traceback.extract_stack()):
+        path = frame.filename
+        if not path.startswith(base) or 'site-packages' in path:
+            continue
+        relative = os.path.relpath(path, base)
+        if relative not in _OWN_FILES:
+            return f'{relative}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def _ensure_handler():
+    if logger.handlers:
+        return
+    with _setup_lock:
+        if logger.handlers:
+            return
+        os.makedirs(os.path.dirname(settings.SLOW_QUERY_LOG), exist_ok=True)
+        handler = RotatingFileHandler(
+            settings.SLOW_QUERY_LOG,
+            maxBytes=settings.SLOW_QUERY_LOG_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+
+
+def record(sql, params, ms, request=None):
+    match = getattr(request, 'resolver_match', None)
+    entry = {
+        'at': timezone.now().isoformat(),
+        'ms': round(ms, 1),
+        'sql': sql,
+        'params': repr(params)[:500],
+        'view': (match.url_name if match and match.url_name else None),
+        'path': getattr(request, 'path', None),
+        'frame': app_frame(),
+        'fingerprint': fingerprint(sql),
+    }
+    try:
+        _ensure_handler()
+        logger.info(json.dumps(entry, default=str))
+    except OSError:
+        pass
+
+
+def read_entries():
+    """Every entry still in the log and its rotated backups, newest file first."""
+    paths = [settings.SLOW_QUERY_LOG] + [f'{settings.SLOW_QUERY_LOG}.{i}' for i in range(1, settings.SLOW_QUERY_LOG_BACKUPS + 1)]
+    entries = []
+    for path in paths:
+        try:
+            with open(path) as fh:
+                for line in fh:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return entries
+
+
+def group_by_fingerprint(entries):
+    """One row per normalized statement: count, total/avg/max ms, views and the latest sample."""
+    groups = {}
+    for entry in entries:
+        group = groups.get(entry['fingerprint'])
+        if group is None:
+            group = groups[entry['fingerprint']] = {
+                'fingerprint': entry['fingerprint'],
+                'statement': normalize(entry['sql']),
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'views': set(),
+                'frames': set(),
+                'last_at': entry['at'],
+                'sample': entry,
+            }
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        group['views'].add(entry.get('view') or entry.get('path') or '-')
+        if entry.get('frame'):
+            group['frames'].add(entry['frame'])
+        if entry['at'] > group['last_at']:
+            group['last_at'] = entry['at']
+            group['sample'] = entry
+    for group in groups.values():
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 1)
+        group['total_ms'] = round(group['total_ms'], 1)
+        group['views'] = sorted(group['views'])
+        group['frames'] = sorted(group['frames'])
+    return sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
@@ -0,0 +1,90 @@
+"""
+OpenTelemetry tracing: a span per request with child spans for every SQL
+statement and every template render, so a slow page shows how its time splits
+between SQL, Python (the request span's own time) and templates.
+
+Off unless OTEL_TRACES_EXPORTER is set to `console`, `file` (JSON lines in
+TRACING_FILE, works offline) or `otlp` (a local collector; the exporter reads
+OTEL_EXPORTER_OTLP_ENDPOINT). The SDK is only imported when tracing is on.
+"""
+import os
+
+from django.conf import settings
+from django.db import connection
+from django.template.base import Template
+
+tracer = None
+
+
+def configure():
+    """Install the tracer provider/exporter and the template hook (once, from CoreConfig.ready)."""
+    global tracer
+    exporter_name = settings.TRACING_EXPORTER
+    if tracer is not None or exporter_name in ('', 'none'):
+        return
+
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if exporter_name == 'otlp':
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    elif exporter_name == 'file':
+        os.makedirs(os.path.dirname(settings.TRACING_FILE), exist_ok=True)
+        exporter = ConsoleSpanExporter(
+            out=open(settings.TRACING_FILE, 'a', buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    else:
+        exporter = ConsoleSpanExporter()
+
+    provider = TracerProvider(resource=Resource.create({'service.name': os.getenv('OTEL_SERVICE_NAME', 'zynchurch')}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    tracer = trace.get_tracer('core.tracing')
+
+    _trace_templates()
+
+
+def _trace_templates():
+    # Template._render runs for the page, its {% extends %} parents and includes
+    render = Template._render
+
+    def traced_render(self, context):
+        with tracer.start_as_current_span(f'render {self.name or "<string>"}') as span:
+            span.set_attribute('django.template.name', self.name or '')
+            return render(self, context)
+
+    Template._render = traced_render
+
+
+def _trace_query(execute, sql, params, many, context):
+    operation = sql.split(None, 1)[0].upper() if sql else 'SQL'
+    with tracer.start_as_current_span(operation) as span:
+        span.set_attribute('db.system.name', connection.vendor)
+        span.set_attribute('db.operation.name', operation)
+        span.set_attribute('db.query.text', sql)
+        return execute(sql, params, many, context)
+
+
+def trace_request(request, get_response):
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    with tracer.start_as_current_span(request.method, kind=SpanKind.SERVER) as span:
+        span.set_attribute('http.request.method', request.method)
+        span.set_attribute('url.path', request.path)
+        with connection.execute_wrapper(_trace_query):
+            response = get_response(request)
+
+        match = request.resolver_match
+        if match:
+            span.update_name(f'{request.method} /{match.route}' if match.route else f'{request.method} {request.path}')
+            span.set_attribute('http.route', match.route)
+            if match.url_name:
+                span.set_attribute('django.view.name', match.url_name)
+        span.set_attribute('http.response.status_code', response.status_code)
+        if response.status_code >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+    return response
@@ -1,4 +1,4 @@
-from django.views.generic import TemplateView, ListView, UpdateView
+from django.views.generic import TemplateView, ListView, UpdateView, View
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth import get_user_model
@@ -15,6 +15,10 @@ from datetime import timedelta
 from django.db.models import Avg, Sum, Count, Q
 from django.db.models.functions import TruncMonth, TruncWeek
 from .models import UserLoginLog
+from . import metrics, slow_queries, profiling
+from django.conf import settings
+from django.http import HttpResponse, FileResponse, Http404
+import hmac
 import json
 
 User = get_user_model()
@@ -96,9 +100,83 @@ class AdminAuditLogView(SuperAdminRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['users'] = User.objects.all().order_by('username')
+        # The user filter is a typeahead (search.views.TypeaheadView), not a list of every user
+        user_id = self.request.GET.get('user')
+        context['selected_user'] = User.objects.filter(pk=user_id).first() if user_id and user_id.isdigit() else None
+        return context
+
+
+class AdminSlowQueryView(SuperAdminRequiredMixin, TemplateView):
+    """Slow-query log grouped by statement fingerprint; ?fingerprint= lists one group's entries."""
+    template_name = "core/admin/slow_queries.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        entries = all_entries = slow_queries.read_entries()
+
+        view = self.request.GET.get('view')
+        if view:
+            entries = [e for e in entries if e.get('view') == view]
+
+        selected = self.request.GET.get('fingerprint')
+        if selected:
+            context['entries'] = sorted((e for e in entries if e['fingerprint'] == selected), key=lambda e: e['at'], reverse=True)[:100]
+
+        context['groups'] = slow_queries.group_by_fingerprint(entries)
+        context['selected'] = selected
+        context['threshold_ms'] = settings.SLOW_QUERY_MS
+        context['view_names'] = sorted({e['view'] for e in all_entries if e.get('view')})
+        return context
+
+class AdminProfileListView(SuperAdminRequiredMixin, TemplateView):
+    """Stored request profiles (add ?profile=1 to any page to record one)."""
+    template_name = "core/admin/profiles.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['profiles'] = profiling.list_profiles()
         return context
 
+
+class AdminProfileDetailView(SuperAdminRequiredMixin, TemplateView):
+    template_name = "core/admin/profile_detail.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        profile = profiling.load(kwargs['profile_id'])
+        if profile is None:
+            raise Http404("Profile not found")
+        sort = self.request.GET.get('sort', 'cumulative')
+        context['profile'] = profile
+        context['sort'] = sort
+        context['sort_keys'] = profiling.SORT_KEYS
+        context['stats'] = profiling.stats_text(profile['id'], sort)
+        return context
+
+
+class AdminProfileDownloadView(SuperAdminRequiredMixin, View):
+    """The raw pstats dump, e.g. for `snakeviz <file>`."""
+
+    def get(self, request, profile_id):
+        path = profiling.stats_path(profile_id)
+        if path is None:
+            raise Http404("Profile not found")
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{profile_id}.prof')
+
+
+class MetricsView(SuperAdminRequiredMixin, View):
+    """Prometheus text metrics; super admins, or scrapers sending `Authorization: Bearer <METRICS_TOKEN>`."""
+
+    def test_func(self):
+        token = settings.METRICS_TOKEN
+        header = self.request.headers.get('Authorization', '')
+        if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:], token):
+            return True
+        return super().test_func()
+
+    def get(self, request):
+        return HttpResponse(metrics.render(metrics.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
 
@@ -153,6 +231,8 @@ from django.utils import timezone
 from datetime import timedelta
 from django.db.models import Avg, Sum, Count, Q
 from django.db.models.functions import TruncMonth, TruncWeek
+from analytics import rollups, parishes
+from operations.stats import attendance_stats
 import json
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -183,103 +263,76 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 pass
 
         # --- Top Cards ---
+        # All card/chart totals come from the analytics rollup tables (constant cost
+        # regardless of how much history is stored).
         
         # 1. Total Attendance
         # If filtered, sum usage in range. Else, last Sunday.
         if filter_start and filter_end:
-            total_attendance = Attendance.objects.filter(date__range=[filter_start, filter_end])\
-                .aggregate(sum=Sum('total_count'))['sum'] or 0
+            range_totals = rollups.totals_between(filter_start, filter_end)
+            total_attendance = range_totals['attendance_total']
         else:
             # Last recorded Sunday
-            last_att_record = Attendance.objects.order_by('-date').first()
-            last_att_date = last_att_record.date if last_att_record else None
+            last_att_date = rollups.latest_attendance_date()
             total_attendance = 0
             if last_att_date:
-                total_attendance = Attendance.objects.filter(date=last_att_date).aggregate(sum=Sum('total_count'))['sum'] or 0
+                total_attendance = rollups.totals_between(last_att_date, last_att_date)['attendance_total']
 
-        # ... (other cards logic simplified, omitting for brevity based on instruction to add filtering)
-        # Actually I need to keep the other cards logic intact or wrap it.
-        # Let's assume we filter Filter-able metrics (Attendance, Giving) but keep "New Visitors" relative to the view.
-        
         # Avg this month (or Avg in Range if filtered)
         if filter_start and filter_end:
              # Avg per entry in range
-             month_avg = Attendance.objects.filter(date__range=[filter_start, filter_end])\
-                .aggregate(avg=Avg('total_count'))['avg'] or 0
+             services = range_totals['attendance_services']
+             month_avg = range_totals['attendance_total'] / services if services else 0
         else:
-            month_avg = Attendance.objects.filter(date__year=now.year, date__month=now.month)\
-                .values('date').annotate(day_total=Sum('total_count'))\
-                .aggregate(avg=Avg('day_total'))['avg'] or 0
+            # Avg of the daily totals this month
+            month_totals = rollups.totals_between(today.replace(day=1), rollups.month_end(today))
+            month_avg = month_totals['attendance_total'] / month_totals['days'] if month_totals['days'] else 0
 
-        # 2. New Visitors (This Week)
+        # 2. New Visitors (This Week)  &  3. Weekly Giving
         if filter_start and filter_end:
-            new_visitors = Attendance.objects.filter(date__range=[filter_start, filter_end])\
-                .aggregate(sum=Sum('first_timers_count'))['sum'] or 0
-        else:
-            new_visitors = Attendance.objects.filter(date__gte=week_start).aggregate(sum=Sum('first_timers_count'))['sum'] or 0
-        
-        # 3. Weekly Giving
-        if filter_start and filter_end:
-            weekly_giving = Finance.objects.filter(date__range=[filter_start, filter_end])\
-                .aggregate(sum=Sum('amount'))['sum'] or 0
-            # Goal is hard to define for range, let's just show raw total. 
-            # Or assume goal accumulates: 50k * weeks.
-            # Keeping simple: just show total, percentage might be irrelevant or >100%
-            giving_percentage = 0 # Hide percentage for custom range or calc differently?
-            # Let's try to scale goal:
+            new_visitors = range_totals['first_timers']
+            weekly_giving = range_totals['giving_total']
+            # Goal is hard to define for range, scale it: 50k * weeks.
             weeks = max(1, int((filter_end - filter_start).days / 7))
             weekly_goal = 50000 * weeks
             giving_percentage = int((weekly_giving / weekly_goal) * 100) if weekly_goal > 0 else 0
         else:
             # This week's total
-            weekly_giving = Finance.objects.filter(date__gte=week_start).aggregate(sum=Sum('amount'))['sum'] or 0
+            week_totals = rollups.totals_between(week_start)
+            new_visitors = week_totals['first_timers']
+            weekly_giving = week_totals['giving_total']
             weekly_goal = 50000 
             giving_percentage = int((weekly_giving / weekly_goal) * 100) if weekly_goal > 0 else 0
 
         # 5. Retention Rate (Active Members / Total Members)
-        total_mems = Member.objects.count()
-        active_mems = Member.objects.filter(status='active').count()
+        member_counts = Member.objects.aggregate(total=Count('id'), active=Count('id', filter=Q(status='active')))
+        total_mems = member_counts['total']
+        active_mems = member_counts['active']
         # Fallback to avoid division by zero
         retention_rate = int((active_mems / total_mems) * 100) if total_mems > 0 else 0
 
         # 6. Community Impact (Total People Reached)
         if filter_start and filter_end:
-            total_impact = CommunityImpact.objects.filter(date__range=[filter_start, filter_end])\
-                .aggregate(sum=Sum('people_impacted'))['sum'] or 0
+            total_impact = range_totals['people_impacted']
         else:
-            total_impact = CommunityImpact.objects.aggregate(sum=Sum('people_impacted'))['sum'] or 0
+            total_impact = rollups.all_time_totals()['people_impacted']
 
-        # ...
-        
-        # 5. Attendance Trends
-        # If filtered, show data in that range. Else Default logic.
-        
         # 5. Attendance Trends
         # Always show Jan-Dec comparison for the selected year (or current year) vs Previous Year
         
         chart_year = filter_start.year if filter_start else now.year
         prev_year = chart_year - 1
 
-        # Helper to get monthly totals
-        def get_monthly_data(year):
-            data = Attendance.objects.filter(date__year=year)\
-                .values('date__month').annotate(total=Sum('total_count')).order_by('date__month')
-            monthly_totals = [0] * 12
-            for entry in data:
-                # date__month is 1-12, index is 0-11
-                monthly_totals[entry['date__month'] - 1] = entry['total']
-            return monthly_totals
-
-        this_year_total = get_monthly_data(chart_year)
-        last_year_total = get_monthly_data(prev_year)
+        # Attendance, giving & expense series for both years in one rollup query
+        series = rollups.monthly_series(chart_year, prev_year)
         
         trend_labels = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
         
         # We pass THIS YEAR (or selected year) as main data, LAST YEAR as comparison
         chart_data_payload = {
             'labels': trend_labels,
-            'this_year': this_year_total,
-            'last_year': last_year_total
+            'this_year': series[chart_year]['attendance'],
+            'last_year': series[prev_year]['attendance']
         }
 
         # 6. Weekly Service Summary (Breakdown of last Sunday)
@@ -293,8 +346,7 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # Requirement: "Weekly Service Tables". Let's show the services belonging to the week ending on anchor_date.
         # Actually, let's just grab the last 7 days ending on anchor_date or latest recorded date.
         
-        last_att_record = Attendance.objects.order_by('-date').first()
-        latest_db_date = last_att_record.date if last_att_record else now.date()
+        latest_db_date = last_att_date or rollups.latest_attendance_date() or now.date()
         
         ref_date = filter_end if (filter_end and filter_end <= latest_db_date) else latest_db_date
         week_window_start = ref_date - timedelta(days=6)
@@ -313,28 +365,9 @@ class DashboardView(LoginRequiredMixin, TemplateView):
             "11:00 AM Modern": {"medium": "Physical", "day": "Sunday", "time": "11:00am"},
         }
         
-        service_summary = []
-        for svc in recent_services:
-            meta = service_meta.get(svc.service_type, {"medium": "Physical", "day": svc.date.strftime('%A'), "time": "TBD"})
-            
-            # Mock capacity
-            capacity = 1000
-            percent = int((svc.total_count / capacity) * 100)
-            
-            service_summary.append({
-                'name': svc.service_type,
-                'count': svc.total_count,
-                'percent': percent,
-                'medium': meta['medium'],
-                'day': meta['day'],
-                'time': meta['time']
-            })
-            
-        # Sort by Day-of-week logic? Or Date? Sorting by Date is safest.
-        # But 'recent_services' is unsorted?
+        # Sort by Date
         recent_services = recent_services.order_by('date')
         
-        # Re-build sorted list
         service_summary = []
         for svc in recent_services:
             meta = service_meta.get(svc.service_type, {"medium": "Physical", "day": svc.date.strftime('%A'), "time": "TBD"})
@@ -358,41 +391,17 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # 1. Giving Trend (Jan-Dec for selected year vs Previous Year)
         # Using chart_year from Attendance logic (defined above as filter_year or current_year)
         
-        def get_monthly_giving(year):
-            data = Finance.objects.filter(date__year=year)\
-                .annotate(month=TruncMonth('date'))\
-                .values('month').annotate(total=Sum('amount')).order_by('month')
-            totals = [0] * 12
-            for entry in data:
-                totals[entry['month'].month - 1] = float(entry['total'])
-            return totals
-
-        giving_this_year = get_monthly_giving(chart_year)
-        giving_last_year = get_monthly_giving(prev_year)
-        
         giving_payload = {
-            'this_year': giving_this_year,
-            'last_year': giving_last_year,
+            'this_year': series[chart_year]['giving'],
+            'last_year': series[prev_year]['giving'],
             'years': [chart_year, prev_year]
         }
             
         # 2. Expense Trend (Jan-Dec for selected year vs Previous Year)
-        # Mirroring Giving logic
-        def get_monthly_expense(year):
-            data = Expense.objects.filter(date__year=year)\
-                .annotate(month=TruncMonth('date'))\
-                .values('month').annotate(total=Sum('amount')).order_by('month')
-            totals = [0] * 12
-            for entry in data:
-                totals[entry['month'].month - 1] = float(entry['total'])
-            return totals
-
-        expense_this_year = get_monthly_expense(chart_year)
-        expense_last_year = get_monthly_expense(prev_year)
-
+        # Mirroring Giving logic, same rollup query
         expense_payload = {
-            'this_year': expense_this_year,
-            'last_year': expense_last_year,
+            'this_year': series[chart_year]['expense'],
+            'last_year': series[prev_year]['expense'],
             'years': [chart_year, prev_year]
         }
 
@@ -468,57 +477,21 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         # 7. Top Parishes List (For new "Parish Performance" Card)
         # Fetch Top 5 Parishes by Returns in current year
         
-        top_parishes_qs = Finance.objects.filter(date__year=chart_year, parish__isnull=False)\
-            .values('parish__id', 'parish__name', 'parish__address')\
-            .annotate(total_returns=Sum('amount'))\
-            .order_by('-total_returns')[:5]
-            
-        parish_list = []
-        for p in top_parishes_qs:
-            p_id = p['parish__id']
-            curr_returns = p['total_returns']
-            
-            # Returns Growth
-            prev_returns = Finance.objects.filter(date__year=prev_year, parish_id=p_id)\
-                .aggregate(total=Sum('amount'))['total'] or 0
-                
-            returns_growth = 0
-            if prev_returns > 0:
-                returns_growth = int(((curr_returns - prev_returns) / prev_returns) * 100)
-            elif curr_returns > 0:
-                returns_growth = 100
-            
-            # Members Growth (Cumulative up to end of year)
-            # Current Members: Joined on or before Dec 31 of chart_year
-            curr_members = Member.objects.filter(created_at__year__lte=chart_year, parish_id=p_id).count()
-            
-            # Prev Members: Joined on or before Dec 31 of prev_year
-            prev_members = Member.objects.filter(created_at__year__lte=prev_year, parish_id=p_id).count()
-            
-            members_growth = 0
-            if prev_members > 0:
-                members_growth = int(((curr_members - prev_members) / prev_members) * 100)
-            elif curr_members > 0:
-                members_growth = 100
-
-            parish_list.append({
-                'name': p['parish__name'],
-                'location': p['parish__address'] or 'Main Campus',
-                'returns': curr_returns,
-                'returns_growth': returns_growth,
-                'members': curr_members,
-                'members_growth': members_growth,
-            })
+        # One annotated query (returns & cumulative members for both years)
+        top_parishes = parishes.parish_performance(chart_year).filter(returns__gt=0).order_by('-returns')[:5]
+        parish_list = [parishes.as_row(p) for p in top_parishes]
 
         context.update({
             'cards': {
                 'total_attendance': int(total_attendance),
                 'month_avg': int(month_avg),
+                # Month-over-month attendance, same figure as the attendance list
+                'attendance_growth': attendance_stats()['growth_rate'],
                 'new_visitors': new_visitors,
                 'weekly_giving': int(weekly_giving) if weekly_giving else 0,
                 'giving_percentage': giving_percentage,
                 'retention_rate': retention_rate,
-                'total_members': Member.objects.count(),
+                'total_members': total_mems,
                 'total_impact': total_impact,
             },
             'parish_list': parish_list,
@@ -1,5 +1,5 @@
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-from django.db.models import Q, Sum, Count, Avg
+from django.db.models import Sum, Count, Avg
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.shortcuts import redirect, get_object_or_404
@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from core.views import SuperAdminRequiredMixin
 from .models import Employee, LeaveRequest, PayrollRecord, EmployeeDocument, PerformanceReview
 from ministry.models import Ministry
+from search.index import filter_matching
 
 # ==================== HR Dashboard ====================
 class HRDashboardView(SuperAdminRequiredMixin, ListView):
@@ -44,12 +45,7 @@ class HRDashboardView(SuperAdminRequiredMixin, ListView):
         # Search
         search = self.request.GET.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(employee_id__icontains=search) |
-                Q(job_title__icontains=search)
-            )
+            queryset = filter_matching(queryset, search)
         
         return queryset.order_by('last_name', 'first_name')
     
@@ -118,12 +114,7 @@ class EmployeeListView(SuperAdminRequiredMixin, ListView):
         # Search
         search = self.request.GET.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(employee_id__icontains=search) |
-                Q(job_title__icontains=search)
-            )
+            queryset = filter_matching(queryset, search)
         
         # Filter by department
         department = self.request.GET.get('department', '')
@@ -40,6 +40,12 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Published upcoming events, soonest first
+            models.Index(fields=['status', 'start_date'], name='event_status_start_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
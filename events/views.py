@@ -4,6 +4,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.http import JsonResponse
 from .models import Event, EventCategory, EventRSVP
+from people.identity import current_member
+from search.index import filter_matching
 
 class EventListView(LoginRequiredMixin, ListView):
     model = Event
@@ -21,12 +23,7 @@ class EventListView(LoginRequiredMixin, ListView):
         # Search
         query = self.request.GET.get('q')
         if query:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(title__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(location__icontains=query)
-            )
+            queryset = filter_matching(queryset, query)
             
         return queryset.order_by('start_date')
 
@@ -43,10 +40,11 @@ class EventDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Check user's RSVP status
-        if self.request.user.is_authenticated and hasattr(self.request.user, 'member_profile'):
+        member = current_member(self.request)
+        if member:
              context['user_rsvp'] = EventRSVP.objects.filter(
                  event=self.object, 
-                 member=self.request.user.member_profile
+                 member=member
              ).first()
         return context
 
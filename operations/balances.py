@@ -0,0 +1,119 @@
+"""
+BankAccount balances derived from the ledger: current_balance is the opening
+balance plus the account's Finance inflows minus its Expense outflows. Saves
+and deletes move it by the row's delta with F() (see operations.signals);
+rebuild_balances() recomputes it from the ledger after bulk writes or drift.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .ledger import INCOME, EXPENSE
+from .models import BankAccount, Finance, Expense
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENT = Decimal('0.01')
+
+# Sign of a row's amount in its account's balance
+SIGNS = {Finance: 1, Expense: -1}
+
+
+def apply_delta(account_id, delta):
+    """Move an account's balance by `delta` in one UPDATE (no read-modify-write)."""
+    if account_id and delta:
+        BankAccount.objects.filter(pk=account_id).update(current_balance=F('current_balance') + delta)
+
+
+def ledger_entry(instance):
+    """(account id, signed amount) a Finance/Expense row contributes to a balance."""
+    return instance.bank_account_id, SIGNS[type(instance)] * Decimal(instance.amount or 0)
+
+
+def _flow_total(model):
+    qs = model.objects.filter(bank_account=OuterRef('pk'))\
+        .order_by().values('bank_account').annotate(total=Sum('amount')).values('total')
+    return Coalesce(Subquery(qs, output_field=MONEY), Value(Decimal('0')), output_field=MONEY)
+
+
+def with_ledger_balance(queryset=None):
+    """Accounts annotated with ledger_balance, the balance their ledger rows add up to."""
+    queryset = BankAccount.objects.all() if queryset is None else queryset
+    return queryset.annotate(ledger_balance=ExpressionWrapper(
+        F('opening_balance') + _flow_total(Finance) - _flow_total(Expense), output_field=MONEY,
+    ))
+
+
+def drifted_accounts():
+    """(account, stored balance, ledger balance) of every account whose stored balance is off by a cent or more."""
+    return [
+        (account, account.current_balance, account.ledger_balance.quantize(CENT))
+        for account in with_ledger_balance().order_by('name')
+        if abs(account.current_balance - account.ledger_balance) >= CENT
+    ]
+
+
+def rebuild_balances(accounts=None):
+    """
+    Recompute current_balance from the ledger in one UPDATE, each account
+    summing its inflows and outflows once. Returns the number of accounts updated.
+    """
+    accounts = BankAccount.objects.all() if accounts is None else accounts
+    return accounts.update(current_balance=F('opening_balance') + _flow_total(Finance) - _flow_total(Expense))
+
+
+def balance_before(account, day):
+    """The account's balance at the start of `day`."""
+    flows = [
+        model.objects.filter(bank_account=account, date__lt=day).aggregate(total=Sum('amount'))['total'] or 0
+        for model in (Finance, Expense)
+    ]
+    return (account.opening_balance + Decimal(flows[0]) - Decimal(flows[1])).quantize(CENT)
+
+
+def statement(account, date_from, date_to):
+    """
+    The account's ledger rows from date_from to date_to, oldest first, each with
+    the running balance after it: a SUM() window over both tables, taken over the
+    whole history so everything before date_from is brought forward.
+    Returns {'opening', 'closing', 'rows'}.
+    """
+    sql = f'''
+        SELECT date, kind, id, category, description, amount, running FROM (
+            SELECT date, kind, id, category, description, amount,
+                   SUM(amount) OVER (ORDER BY date, kind DESC, id ROWS UNBOUNDED PRECEDING) AS running
+            FROM (
+                SELECT date, {INCOME} AS kind, id, category, description, amount
+                FROM {Finance._meta.db_table} WHERE bank_account_id = %s AND date <= %s
+                UNION ALL
+                SELECT date, {EXPENSE} AS kind, id, category, description, -amount
+                FROM {Expense._meta.db_table} WHERE bank_account_id = %s AND date <= %s
+            )
+        )
+        WHERE date >= %s
+        ORDER BY date, kind DESC, id
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [account.pk, date_to, account.pk, date_to, date_from])
+        rows = [
+            {
+                'date': day if isinstance(day, date) else date.fromisoformat(day),
+                'type': 'Income' if kind == INCOME else 'Expense',
+                'id': pk,
+                'category': category,
+                'description': description,
+                # SQLite sums decimals as floats; back to cents
+                'amount': Decimal(str(amount)).quantize(CENT),
+                'balance': (account.opening_balance + Decimal(str(running))).quantize(CENT),
+            }
+            for day, kind, pk, category, description, amount, running in cursor.fetchall()
+        ]
+
+    if rows:
+        opening = rows[0]['balance'] - rows[0]['amount']
+        closing = rows[-1]['balance']
+    else:
+        opening = closing = balance_before(account, date_from)
+    return {'opening': opening, 'closing': closing, 'rows': rows}
@@ -0,0 +1,100 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import OuterRef, Subquery, Sum, Value, DateField, DecimalField, CharField
+from django.db.models.functions import Coalesce, Cast, Concat
+from django.utils import timezone
+
+from .models import Budget, Expense
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+CENT = Decimal('0.01')
+
+# Share of a budget spent at which it starts showing up in the alerts
+WARNING_UTILIZATION = 90
+
+# Alert levels, most severe first
+OVER_BUDGET, PROJECTED_OVERRUN, WARNING = 'over_budget', 'projected_overrun', 'warning'
+ALERT_LEVELS = (OVER_BUDGET, PROJECTED_OVERRUN, WARNING)
+
+
+def _year_bound(month_day):
+    # 'YYYY-MM-DD' built from Budget.year; SQLite compares ISO dates as text, so the
+    # spend subquery below still ranges over the (category, date) index
+    return Concat(Cast('year', CharField()), Value(month_day), output_field=DateField())
+
+
+def _spent():
+    qs = Expense.objects.filter(
+        category=OuterRef('category'),
+        date__gte=OuterRef('period_start'),
+        date__lte=OuterRef('period_end'),
+    ).order_by().values('category').annotate(total=Sum('amount')).values('total')
+    return Coalesce(Subquery(qs, output_field=MONEY), Value(Decimal('0')), output_field=MONEY)
+
+
+def budget_utilization(queryset=None):
+    """
+    Budgets annotated with their period (start_date/end_date, else the budget's
+    calendar year) and the Expense spend of their category inside it, in a
+    single query.
+    """
+    queryset = Budget.objects.all() if queryset is None else queryset
+    return queryset.annotate(
+        period_start=Coalesce('start_date', _year_bound('-01-01'), output_field=DateField()),
+        period_end=Coalesce('end_date', _year_bound('-12-31'), output_field=DateField()),
+    ).annotate(
+        spent=_spent(),
+    )
+
+
+def as_row(budget, today=None):
+    """
+    Figures of one annotated budget. The burn rate is the spend per day elapsed
+    in the period so far; the projection carries it on to the end of the period.
+    """
+    today = today or timezone.localdate()
+    start, end = budget.period_start, budget.period_end
+    spent = Decimal(budget.spent).quantize(CENT)
+    amount = budget.amount
+
+    elapsed = (min(today, end) - start).days + 1 if today >= start else 0
+    burn_rate = spent / elapsed if elapsed > 0 else Decimal(0)
+    days_left = max((end - max(today, start - timedelta(days=1))).days, 0)
+    projected = spent + burn_rate * days_left
+    utilization = float(spent / amount * 100) if amount else 0.0
+
+    return {
+        'id': budget.pk,
+        'category': budget.category,
+        'description': budget.description,
+        'year': budget.year,
+        'amount': amount,
+        'period_start': start,
+        'period_end': end,
+        'spent': spent,
+        'remaining': amount - spent,
+        'utilization': round(utilization, 1),
+        'burn_rate': burn_rate.quantize(CENT),
+        'projected': projected.quantize(CENT),
+        'projected_overrun': max(projected - amount, Decimal(0)).quantize(CENT),
+        'alert': _alert_level(spent, projected, amount, utilization),
+    }
+
+
+def _alert_level(spent, projected, amount, utilization):
+    if spent > amount:
+        return OVER_BUDGET
+    if projected > amount:
+        return PROJECTED_OVERRUN
+    if utilization >= WARNING_UTILIZATION:
+        return WARNING
+    return None
+
+
+def alerts(year=None, today=None):
+    """Rows of the budgets of `year` (default: this year) that need attention, most severe first."""
+    today = today or timezone.localdate()
+    rows = [as_row(b, today) for b in budget_utilization(Budget.objects.filter(year=year or today.year))]
+    flagged = [row for row in rows if row['alert']]
+    return sorted(flagged, key=lambda row: (ALERT_LEVELS.index(row['alert']), -row['utilization']))
@@ -0,0 +1,162 @@
+from collections import Counter
+
+from django.core import signing
+from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from people.models import Member
+from .models import Attendance, MemberAttendance
+
+# Oldest age counted under children_count (matches the 0-12 analytics bucket)
+CHILD_MAX_AGE = 12
+
+TOKEN_SALT = 'operations.checkins'
+
+
+def headcount_field(member, on):
+    """Which Attendance breakdown a member's check-in on `on` counts towards."""
+    if member.member_type == 'Guest':
+        return 'first_timers_count'
+    dob = member.dob
+    if dob and on.year - dob.year - ((on.month, on.day) < (dob.month, dob.day)) <= CHILD_MAX_AGE:
+        return 'children_count'
+    return 'adult_count'
+
+
+def service_attendance(day, service, service_type):
+    """
+    The Attendance row self check-ins for `service` on `day` go to, created on first
+    use; without a Service it is the parish-wide row named `service_type`. The row is
+    unique (unique_service_attendance / unique_adhoc_service_attendance), so when two
+    first check-ins race, the losing insert fails and get_or_create reads the winner's row.
+    """
+    lookup = {'date': day, 'service': service}
+    if service is None:
+        lookup.update(service_type=service_type, parish=None)
+    attendance, _ = Attendance.objects.get_or_create(**lookup, defaults={'service_type': service_type, 'total_count': 0})
+    return attendance
+
+
+def check_in(attendance, member, status='Present'):
+    """
+    Record `member` at `attendance` in one transaction: the breakdown and total_count
+    are bumped with F() (no read-modify-write) and the unique (attendance, member)
+    constraint turns a repeat into a rollback. Returns the MemberAttendance, or None
+    if the member was already checked in.
+    """
+    field = headcount_field(member, attendance.date)
+    try:
+        with transaction.atomic():
+            # Counters first so receivers of the check-in's post_save see the new totals
+            Attendance.objects.filter(pk=attendance.pk).update(**{
+                field: F(field) + 1,
+                'total_count': F('total_count') + 1,
+            })
+            return MemberAttendance.objects.create(attendance=attendance, member=member, status=status)
+    except IntegrityError:
+        return None
+
+
+def recount_check_ins(attendances=None):
+    """
+    Recompute Attendance.checked_in_count from MemberAttendance in one UPDATE.
+    Needed after bulk_create and after writes inside operations.signals.bulk_load, which
+    bypass MemberAttendance.save and the check-in delete receiver.
+    Returns the number of services updated.
+    """
+    attendances = Attendance.objects.all() if attendances is None else attendances
+    counts = MemberAttendance.objects.filter(attendance=OuterRef('pk'))\
+        .order_by().values('attendance').annotate(n=Count('id')).values('n')
+    return attendances.update(checked_in_count=Coalesce(Subquery(counts), Value(0)))
+
+
+def drifted_services():
+    """Services whose stored checked_in_count no longer matches their check-ins."""
+    return Attendance.objects.annotate(actual=Count('details')).exclude(checked_in_count=F('actual'))
+
+
+def member_token(member):
+    """Opaque value printed in a member's check-in QR code (a signed member id)."""
+    return signing.dumps(member.pk, salt=TOKEN_SALT)
+
+
+def _token_member_id(token):
+    try:
+        return int(signing.loads(token, salt=TOKEN_SALT))
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+
+
+def resolve_members(member_ids=(), tokens=(), phones=()):
+    """
+    Look up a kiosk batch (member ids, QR tokens, phone numbers) in one query.
+    Returns ({identifier: Member}, [unresolved identifiers]); identifiers are
+    ('member', id), ('token', value) or ('phone', value).
+    """
+    wanted = [('member', pk) for pk in member_ids]
+    wanted += [('token', token) for token in tokens]
+    wanted += [('phone', phone) for phone in phones]
+
+    token_ids = {token: _token_member_id(token) for token in tokens}
+    ids = set(member_ids) | {pk for pk in token_ids.values() if pk}
+    lookup = Q(pk__in=ids)
+    if phones:
+        lookup |= Q(phone__in=phones) | Q(whatsapp_number__in=phones)
+    found = Member.objects.filter(lookup).only('id', 'member_type', 'dob', 'phone', 'whatsapp_number') if wanted else []
+
+    by_id, by_phone = {}, {}
+    for member in found:
+        by_id[member.pk] = member
+        for number in (member.whatsapp_number, member.phone):
+            if number:
+                by_phone[number] = member
+
+    resolved, unresolved = {}, []
+    for kind, value in wanted:
+        if kind == 'member':
+            member = by_id.get(value)
+        elif kind == 'token':
+            member = by_id.get(token_ids[value])
+        else:
+            member = by_phone.get(value)
+        if member:
+            resolved[(kind, value)] = member
+        else:
+            unresolved.append({kind: value})
+    return resolved, unresolved
+
+
+def bulk_check_in(attendance, entries, status='Present'):
+    """
+    Record a batch of (member, checked_in_at or None) at `attendance`: one
+    bulk_create(ignore_conflicts=True) and a single F() update of the counters.
+    The service row is locked for the batch so the counter delta is exact even
+    when single check-ins run concurrently. Returns (checked_in, already_checked_in).
+    """
+    first_seen = {}
+    for member, checked_in_at in entries:
+        first_seen.setdefault(member.pk, (member, checked_in_at))
+
+    with transaction.atomic():
+        attendance = Attendance.objects.select_for_update().get(pk=attendance.pk)
+        present = set(MemberAttendance.objects.filter(
+            attendance=attendance, member_id__in=first_seen
+        ).values_list('member_id', flat=True))
+
+        fresh = [(member, at) for pk, (member, at) in first_seen.items() if pk not in present]
+        now = timezone.now()
+        MemberAttendance.objects.bulk_create([
+            MemberAttendance(attendance=attendance, member=member, status=status, check_in_time=at or now)
+            for member, at in fresh
+        ], ignore_conflicts=True)
+
+        if fresh:
+            breakdown = Counter(headcount_field(member, attendance.date) for member, _ in fresh)
+            Attendance.objects.filter(pk=attendance.pk).update(
+                total_count=F('total_count') + len(fresh),
+                checked_in_count=F('checked_in_count') + len(fresh),
+                **{field: F(field) + n for field, n in breakdown.items()},
+            )
+    return len(fresh), len(first_seen) - len(fresh)
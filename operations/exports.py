@@ -0,0 +1,28 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object for csv.writer that hands each encoded row straight back."""
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    """
+    Streams `rows` (any iterable, normally a queryset .iterator()) as a CSV
+    download without holding the whole result set in memory.
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,90 @@
+"""
+Income/expense summary for the financial dashboard: year-to-date and
+month-to-date totals with the same stretch of the prior year/month, in one
+conditional-aggregation query per table, and the recent-transactions feed
+from the ledger's UNION query. Cached for the day and dropped on any
+Finance/Expense write (operations.signals).
+"""
+import calendar
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .ledger import ledger_union
+from .models import Finance, Expense
+
+CACHE_PREFIX = 'operations:finance-summary'
+RECENT_TRANSACTIONS = 10
+
+
+def _cache_key(today):
+    return f'{CACHE_PREFIX}:{today.isoformat()}'
+
+
+def _same_day(year, month, day):
+    """`day` of year/month, clamped to the month's length (31 March -> 28/29 February)."""
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def periods(today):
+    """{name: (start, end)} of the windows summed for each table, all inclusive."""
+    month_start = today.replace(day=1)
+    prior_month = (month_start.year, month_start.month - 1) if month_start.month > 1 else (month_start.year - 1, 12)
+    return {
+        'ytd': (today.replace(month=1, day=1), today),
+        'prior_ytd': (date(today.year - 1, 1, 1), _same_day(today.year - 1, today.month, today.day)),
+        'mtd': (month_start, today),
+        'prior_mtd': (date(*prior_month, 1), _same_day(*prior_month, today.day)),
+    }
+
+
+def _totals(model, windows):
+    """Sum of amount over every window, in one query bounded by the earliest start."""
+    earliest = min(start for start, end in windows.values())
+    return model.objects.filter(date__gte=earliest).aggregate(**{
+        name: Sum('amount', filter=Q(date__range=(start, end)), default=Decimal(0))
+        for name, (start, end) in windows.items()
+    })
+
+
+def _change(current, prior):
+    """Percent change on the prior period, None when there is nothing to compare with."""
+    if not prior:
+        return None
+    return round(float((current - prior) / prior * 100), 1)
+
+
+def finance_summary():
+    """
+    {'income': {...}, 'expense': {...}, 'net_ytd', 'efficiency', 'recent'} as of
+    today. Each table's dict has ytd, prior_ytd, mtd, prior_mtd and the percent
+    changes ytd_change/mtd_change; efficiency is the share of YTD income spent.
+    """
+    today = timezone.localdate()
+    key = _cache_key(today)
+    summary = cache.get(key)
+    if summary is None:
+        windows = periods(today)
+        summary = {}
+        for name, model in (('income', Finance), ('expense', Expense)):
+            totals = _totals(model, windows)
+            totals['ytd_change'] = _change(totals['ytd'], totals['prior_ytd'])
+            totals['mtd_change'] = _change(totals['mtd'], totals['prior_mtd'])
+            summary[name] = totals
+
+        income_ytd, expense_ytd = summary['income']['ytd'], summary['expense']['ytd']
+        summary['net_ytd'] = income_ytd - expense_ytd
+        summary['efficiency'] = float(expense_ytd / income_ytd * 100) if income_ytd > 0 else 0
+        summary['recent'] = list(ledger_union()[:RECENT_TRANSACTIONS])
+        # The key carries the date, so a day is plenty
+        cache.set(key, summary, 24 * 60 * 60)
+    return summary
+
+
+def invalidate():
+    # After commit, so a request racing the write cannot cache pre-commit figures for the day
+    transaction.on_commit(lambda: cache.delete(_cache_key(timezone.localdate())))
@@ -71,3 +71,19 @@ class ExpenseForm(forms.ModelForm):
             'authorized_by': forms.Select(attrs={'class': 'w-full px-4 py-2 rounded-lg border border-slate-200 dark:border-slate-600 bg-transparent focus:ring-2 focus:ring-brand-navy outline-none transition-all'}),
             'bank_account': forms.Select(attrs={'class': 'w-full px-4 py-2 rounded-lg border border-slate-200 dark:border-slate-600 bg-transparent focus:ring-2 focus:ring-brand-navy outline-none transition-all'}),
         }
+
+
+class StatementUploadForm(forms.Form):
+    # Largest statement file accepted
+    MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+    account = forms.ModelChoiceField(queryset=BankAccount.objects.order_by('name'), widget=forms.Select(attrs={'class': 'w-full px-4 py-2 rounded-lg border border-slate-200 dark:border-slate-600 bg-transparent focus:ring-2 focus:ring-brand-navy outline-none transition-all'}))
+    file = forms.FileField(help_text='CSV (with a header row) or OFX/QFX', widget=forms.ClearableFileInput(attrs={'accept': '.csv,.ofx,.qfx', 'class': 'w-full text-sm text-slate-600 dark:text-slate-300'}))
+
+    def clean_file(self):
+        f = self.cleaned_data['file']
+        if not f.name.lower().endswith(('.csv', '.ofx', '.qfx')):
+            raise forms.ValidationError('Upload a .csv, .ofx or .qfx file.')
+        if f.size > self.MAX_UPLOAD_BYTES:
+            raise forms.ValidationError('The file is larger than 20 MB.')
+        return f
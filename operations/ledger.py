@@ -0,0 +1,112 @@
+from datetime import date
+
+from django.db.models import Q, Value, CharField, IntegerField
+
+from search.index import filter_matching
+
+from .models import Finance, Expense
+
+# Tie-breaker between the two tables when rows share a date (ids overlap across tables)
+INCOME, EXPENSE = 1, 0
+
+LEDGER_FIELDS = ('id', 'date', 'category', 'description', 'amount', 'type', 'kind')
+
+
+def encode_cursor(row):
+    return f"{row['date'].isoformat()}_{row['kind']}_{row['id']}"
+
+
+def decode_cursor(value):
+    try:
+        d, kind, pk = value.split('_')
+        return date.fromisoformat(d), int(kind), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _keyset(kind, cursor, older):
+    """Rows of a branch with constant `kind` strictly after/before `cursor` in (date, kind, id) order."""
+    c_date, c_kind, c_id = cursor
+    if older:
+        if kind < c_kind:
+            return Q(date__lte=c_date)
+        if kind > c_kind:
+            return Q(date__lt=c_date)
+        return Q(date__lt=c_date) | Q(date=c_date, id__lt=c_id)
+    if kind > c_kind:
+        return Q(date__gte=c_date)
+    if kind < c_kind:
+        return Q(date__gt=c_date)
+    return Q(date__gt=c_date) | Q(date=c_date, id__gt=c_id)
+
+
+def apply_transaction_filters(qs, params):
+    """date_from / date_to / category / q filters shared by the list views, ledger and exports."""
+    date_from = params.get('date_from')
+    date_to = params.get('date_to')
+    category = params.get('category')
+    q = params.get('q')
+
+    if date_from: qs = qs.filter(date__gte=date_from)
+    if date_to: qs = qs.filter(date__lte=date_to)
+    if category: qs = qs.filter(category__icontains=category)
+    if q: qs = filter_matching(qs, q)
+    return qs
+
+
+def _inflows(params):
+    qs = apply_transaction_filters(Finance.objects.all(), params)
+    return qs.annotate(
+        type=Value('Income', output_field=CharField()),
+        kind=Value(INCOME, output_field=IntegerField()),
+    )
+
+
+def _outflows(params):
+    qs = apply_transaction_filters(Expense.objects.all(), params)
+    return qs.annotate(
+        type=Value('Expense', output_field=CharField()),
+        kind=Value(EXPENSE, output_field=IntegerField()),
+    )
+
+
+def ledger_union(params=None, cursor=None, older=True):
+    """
+    Finance + Expense as one UNION ALL, newest first (or oldest first when paging
+    back). The search/date/category and keyset filters are applied inside each branch.
+    """
+    params = params or {}
+    inflows, outflows = _inflows(params), _outflows(params)
+    if cursor:
+        inflows = inflows.filter(_keyset(INCOME, cursor, older))
+        outflows = outflows.filter(_keyset(EXPENSE, cursor, older))
+
+    union = inflows.values(*LEDGER_FIELDS).union(outflows.values(*LEDGER_FIELDS), all=True)
+    if older:
+        return union.order_by('-date', '-kind', '-id')
+    return union.order_by('date', 'kind', 'id')
+
+
+def ledger_page(params=None, after=None, before=None, size=50):
+    """
+    One keyset page of the ledger. `after` continues to older rows, `before`
+    goes back to newer ones; each costs the same regardless of depth.
+    Returns (rows, newer_cursor, older_cursor).
+    """
+    before_cursor = decode_cursor(before) if before else None
+    after_cursor = decode_cursor(after) if after and not before_cursor else None
+
+    if before_cursor:
+        rows = list(ledger_union(params, before_cursor, older=False)[:size + 1])
+        has_more_newer = len(rows) > size
+        rows = rows[:size][::-1]
+        has_more_older = True
+    else:
+        rows = list(ledger_union(params, after_cursor, older=True)[:size + 1])
+        has_more_older = len(rows) > size
+        rows = rows[:size]
+        has_more_newer = after_cursor is not None
+
+    newer = encode_cursor(rows[0]) if rows and has_more_newer else None
+    older = encode_cursor(rows[-1]) if rows and has_more_older else None
+    return rows, newer, older
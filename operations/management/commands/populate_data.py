@@ -114,15 +114,18 @@ class Command(BaseCommand):
                 adults = random.randint(80, 150)
                 children = random.randint(20, 50)
                 ft = random.randint(0, 5)
-                att = Attendance.objects.create(
+                # One record per service per day (unique_service_attendance), so re-runs keep it
+                _, created = Attendance.objects.get_or_create(
                     date=current_date,
                     service=sunday_srv,
-                    service_type='Sunday Service',
-                    adult_count=adults,
-                    children_count=children,
-                    first_timers_count=ft
+                    defaults=dict(
+                        service_type='Sunday Service',
+                        adult_count=adults,
+                        children_count=children,
+                        first_timers_count=ft,
+                    ),
                 )
-                attendance_created += 1
+                attendance_created += created
                 
                 # Inflows
                 Finance.objects.create(
@@ -149,15 +152,17 @@ class Command(BaseCommand):
 
             elif current_date.weekday() == 2: # Wednesday
                 adults = random.randint(30, 60)
-                Attendance.objects.create(
+                _, created = Attendance.objects.get_or_create(
                     date=current_date,
                     service=midweek_srv,
-                    service_type='Bible Study',
-                    adult_count=adults,
-                    children_count=0,
-                    first_timers_count=random.randint(0, 2)
+                    defaults=dict(
+                        service_type='Bible Study',
+                        adult_count=adults,
+                        children_count=0,
+                        first_timers_count=random.randint(0, 2),
+                    ),
                 )
-                attendance_created += 1
+                attendance_created += created
                 
                 Finance.objects.create(
                     date=current_date,
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from operations.balances import rebuild_balances, drifted_accounts
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds BankAccount.current_balance from the opening balance and the Finance/Expense ledger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report accounts whose balance has drifted')
+
+    def handle(self, *args, **options):
+        drifted = drifted_accounts()
+        for account, stored, ledger in drifted:
+            self.stdout.write(f'{account.name}: stored {stored}, ledger {ledger} (off by {stored - ledger})')
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted)} account(s) with a stale balance.')
+            return
+        updated = rebuild_balances()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {updated} balances ({len(drifted)} had drifted).'))
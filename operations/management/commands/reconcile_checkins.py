@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from operations.checkins import recount_check_ins, drifted_services
+
+
+class Command(BaseCommand):
+    help = 'Recomputes Attendance.checked_in_count from the MemberAttendance check-ins'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report services whose count has drifted')
+
+    def handle(self, *args, **options):
+        drifted = drifted_services().count()
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} service(s) with a stale checked_in_count.')
+            return
+        updated = recount_check_ins()
+        self.stdout.write(self.style.SUCCESS(f'Recounted {updated} services ({drifted} had drifted).'))
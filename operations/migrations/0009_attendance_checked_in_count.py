@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:19
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_checked_in_count(apps, schema_editor):
+    Attendance = apps.get_model('operations', 'Attendance')
+    MemberAttendance = apps.get_model('operations', 'MemberAttendance')
+    counts = MemberAttendance.objects.filter(attendance=OuterRef('pk'))\
+        .order_by().values('attendance').annotate(n=Count('id')).values('n')
+    Attendance.objects.update(checked_in_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0008_bankaccount_budget_expense_bank_account_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='checked_in_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_checked_in_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:20
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def drop_duplicate_check_ins(apps, schema_editor):
+    # Keep the earliest check-in of each (attendance, member) pair, then recount
+    # checked_in_count. total_count and the breakdown counters are left as they are:
+    # they also hold manually entered headcounts, so check-ins cannot rebuild them.
+    Attendance = apps.get_model('operations', 'Attendance')
+    MemberAttendance = apps.get_model('operations', 'MemberAttendance')
+    keep = MemberAttendance.objects.values('attendance', 'member').annotate(first=Min('id')).values('first')
+    MemberAttendance.objects.exclude(id__in=keep).delete()
+    counts = MemberAttendance.objects.filter(attendance=OuterRef('pk'))\
+        .order_by().values('attendance').annotate(n=Count('id')).values('n')
+    Attendance.objects.update(checked_in_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0009_attendance_checked_in_count'),
+        ('people', '0005_member_whatsapp_number'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_check_ins, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='memberattendance',
+            constraint=models.UniqueConstraint(fields=('attendance', 'member'), name='unique_member_check_in'),
+        ),
+    ]
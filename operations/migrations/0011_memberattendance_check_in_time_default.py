@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0010_unique_member_check_in'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='memberattendance',
+            name='check_in_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ministry', '0005_announcement'),
+        ('operations', '0011_memberattendance_check_in_time_default'),
+        ('people', '0005_member_whatsapp_number'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='memberattendance',
+            name='attendance',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='details', to='operations.attendance'),
+        ),
+        migrations.AlterField(
+            model_name='memberattendance',
+            name='member',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='people.member'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date'], name='attendance_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['date'], name='expense_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['category', 'date'], name='expense_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='finance',
+            index=models.Index(fields=['date', 'parish'], name='finance_date_parish_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='finance',
+            index=models.Index(fields=['category', 'date'], name='finance_category_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='memberattendance',
+            index=models.Index(fields=['member', 'attendance'], name='checkin_member_idx'),
+        ),
+    ]
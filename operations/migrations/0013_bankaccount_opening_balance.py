@@ -0,0 +1,40 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:52
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def derive_balances(apps, schema_editor):
+    # The hand-entered balance was the account's starting balance (the form labelled it
+    # "Initial Balance"); the current balance is now that plus the linked ledger rows
+    BankAccount = apps.get_model('operations', 'BankAccount')
+    Finance = apps.get_model('operations', 'Finance')
+    Expense = apps.get_model('operations', 'Expense')
+    money = models.DecimalField(max_digits=14, decimal_places=2)
+
+    def total(model):
+        qs = model.objects.filter(bank_account=OuterRef('pk'))\
+            .order_by().values('bank_account').annotate(total=Sum('amount')).values('total')
+        return Coalesce(Subquery(qs, output_field=money), Value(Decimal('0')), output_field=money)
+
+    BankAccount.objects.update(opening_balance=F('current_balance'))
+    BankAccount.objects.update(current_balance=F('opening_balance') + total(Finance) - total(Expense))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0012_alter_memberattendance_attendance_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankaccount',
+            name='opening_balance',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=12),
+        ),
+        migrations.RunPython(derive_balances, migrations.RunPython.noop),
+    ]
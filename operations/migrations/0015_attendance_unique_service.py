@@ -0,0 +1,51 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:24
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+# Rows each new constraint covers, and the fields it keys them on
+SERVICE_KEYS = (
+    (Q(service__isnull=False), ('date', 'service')),
+    (Q(service__isnull=True, parish__isnull=True, service_type__isnull=False), ('date', 'service_type')),
+)
+
+
+def merge_duplicate_services(apps, schema_editor):
+    # Fold every later record of a (date, service) into the earliest: headcounts are
+    # added up and check-ins move across, except members the earliest already has
+    Attendance = apps.get_model('operations', 'Attendance')
+    MemberAttendance = apps.get_model('operations', 'MemberAttendance')
+    for condition, fields in SERVICE_KEYS:
+        groups = Attendance.objects.filter(condition).values(*fields)\
+            .annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1)
+        for group in groups:
+            keeper = Attendance.objects.get(pk=group['keep'])
+            duplicates = Attendance.objects.filter(condition, **{f: group[f] for f in fields}).exclude(pk=keeper.pk)
+            for row in duplicates:
+                for counter in ('total_count', 'adult_count', 'children_count', 'first_timers_count'):
+                    setattr(keeper, counter, getattr(keeper, counter) + getattr(row, counter))
+                present = MemberAttendance.objects.filter(attendance=keeper).values('member')
+                MemberAttendance.objects.filter(attendance=row).exclude(member__in=present).update(attendance=keeper)
+                row.delete()
+            keeper.checked_in_count = MemberAttendance.objects.filter(attendance=keeper).count()
+            keeper.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ministry', '0005_announcement'),
+        ('operations', '0014_statement_import'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_services, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('service__isnull', False)), fields=('date', 'service'), name='unique_service_attendance'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('parish__isnull', True), ('service__isnull', True)), fields=('date', 'service_type'), name='unique_adhoc_service_attendance'),
+        ),
+    ]
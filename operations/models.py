@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
 from ministry.models import Ministry, Parish, Event
 from people.models import Member
 
@@ -8,6 +10,8 @@ class BankAccount(models.Model):
     account_number = models.CharField(max_length=50, blank=True, null=True)
     bank_name = models.CharField(max_length=100, blank=True, null=True)
     currency = models.CharField(max_length=10, default='NGN')
+    opening_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    # opening_balance + inflows - outflows; kept in step by operations.balances, never edited by hand
     current_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -38,8 +42,26 @@ class Attendance(models.Model):
     adult_count = models.IntegerField(default=0)
     children_count = models.IntegerField(default=0)
     first_timers_count = models.IntegerField(default=0)
+    # Number of MemberAttendance rows (check-ins); kept in step by MemberAttendance.save
+    # and the check-in post_delete receiver in operations.signals
+    checked_in_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='attendance_date_idx'),
+        ]
+        constraints = [
+            # One record per service per day, which self check-ins rely on (see
+            # operations.checkins.service_attendance); a service without a Service
+            # row is keyed by its name. Parish-level records are left free.
+            models.UniqueConstraint(fields=['date', 'service'], condition=models.Q(service__isnull=False),
+                                    name='unique_service_attendance'),
+            models.UniqueConstraint(fields=['date', 'service_type'],
+                                    condition=models.Q(service__isnull=True, parish__isnull=True),
+                                    name='unique_adhoc_service_attendance'),
+        ]
+
     def save(self, *args, **kwargs):
         # Auto-calculate total as: Adults + Children + First Timers
         self.total_count = self.adult_count + self.children_count + self.first_timers_count
@@ -49,10 +71,28 @@ class Attendance(models.Model):
         return f"{self.service_type} - {self.date}"
 
 class MemberAttendance(models.Model):
-    attendance = models.ForeignKey(Attendance, on_delete=models.CASCADE, related_name='details')
-    member = models.ForeignKey(Member, on_delete=models.CASCADE)
+    # No single-column FK indexes: unique_member_check_in leads with attendance,
+    # checkin_member_idx with member
+    attendance = models.ForeignKey(Attendance, on_delete=models.CASCADE, related_name='details', db_index=False)
+    member = models.ForeignKey(Member, on_delete=models.CASCADE, db_index=False)
     status = models.CharField(max_length=50, default='Present')
-    check_in_time = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: replayed kiosk check-ins keep the time they were scanned
+    check_in_time = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['attendance', 'member'], name='unique_member_check_in'),
+        ]
+        indexes = [
+            models.Index(fields=['member', 'attendance'], name='checkin_member_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                Attendance.objects.filter(pk=self.attendance_id).update(checked_in_count=F('checked_in_count') + 1)
 
 class Finance(models.Model):
     date = models.DateField()
@@ -69,6 +109,13 @@ class Finance(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'parish'], name='finance_date_parish_idx'),
+            # Category filter on the income list, and its DISTINCT category dropdown
+            models.Index(fields=['category', 'date'], name='finance_category_date_idx'),
+        ]
+
 class Expense(models.Model):
     date = models.DateField()
     category = models.CharField(max_length=100) # Maintenance, Salaries, Utilities
@@ -81,6 +128,43 @@ class Expense(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='expense_date_idx'),
+            models.Index(fields=['category', 'date'], name='expense_category_date_idx'),
+        ]
+
+class StatementImport(models.Model):
+    """One uploaded bank statement file (CSV or OFX) for an account."""
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='statement_imports')
+    filename = models.CharField(max_length=255)
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    line_count = models.IntegerField(default=0)
+    matched_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.account.name})"
+
+class StatementLine(models.Model):
+    """
+    A staged statement line, matched to at most one ledger entry. amount is signed
+    as the bank shows it: credits (money in) positive, debits negative.
+    """
+    statement_import = models.ForeignKey(StatementImport, on_delete=models.CASCADE, related_name='lines')
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    description = models.CharField(max_length=255, blank=True)
+    # The bank's transaction id (OFX FITID), when the file has one
+    reference = models.CharField(max_length=100, blank=True)
+    matched_finance = models.ForeignKey(Finance, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    matched_expense = models.ForeignKey(Expense, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['statement_import', 'date'], name='statement_line_import_date_idx'),
+        ]
+
 class AuditLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     action = models.CharField(max_length=50) # LOGIN, UPDATE
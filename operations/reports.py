@@ -0,0 +1,154 @@
+"""
+Financial reports over any range of years. Each report groups income and
+expenses by one dimension (year, month, category, parish, ministry or bank
+account) in a single query: a UNION ALL of the two grouped tables, or the
+income table alone for dimensions expenses do not carry. Results are kept as
+analytics period snapshots, so a closed year stays cached until a write
+lands in it.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Callable, NamedTuple
+
+from django.db.models import F, IntegerField, Min, Sum, Value
+from django.db.models.functions import ExtractYear, TruncMonth
+from django.utils import timezone
+
+from analytics.snapshots import get_period_snapshot
+from .ledger import INCOME, EXPENSE
+from .models import Finance, Expense
+
+MAX_YEARS = 10
+CENT = Decimal('0.01')
+UNASSIGNED = 'Unassigned'
+
+
+def _years(start, end):
+    return list(range(start.year, end.year + 1))
+
+
+def _months(start, end):
+    return [date(year, month, 1) for year in range(start.year, end.year + 1) for month in range(1, 13)]
+
+
+class Report(NamedTuple):
+    title: str
+    # Heading of the grouping column
+    key_label: str
+    # () -> expression the rows are grouped by
+    key: Callable
+    # key -> text shown in the report and the CSV
+    label: Callable = lambda key: key or UNASSIGNED
+    # Expenses carry no parish/ministry, so those reports cover income only
+    has_expense: bool = True
+    # (start, end) -> every key of a chronological report, listed even when empty
+    periods: Callable = None
+
+
+REPORTS = {
+    'pnl': Report('Income Statement (P&L)', 'Year', lambda: ExtractYear('date'), label=str, periods=_years),
+    'monthly': Report('Monthly Breakdown', 'Month', lambda: TruncMonth('date'),
+                      label=lambda month: month.strftime('%B %Y'), periods=_months),
+    'category': Report('By Category', 'Category', lambda: F('category')),
+    'parish': Report('By Parish', 'Parish', lambda: F('parish__name'), has_expense=False),
+    'ministry': Report('By Ministry', 'Ministry', lambda: F('ministry__name'), has_expense=False),
+    'bank_account': Report('By Bank Account', 'Bank Account', lambda: F('bank_account__name')),
+}
+
+
+def parse_years(params):
+    """
+    (year_from, year_to) from ?year_from=&year_to= (or a single ?year=), the
+    current year when missing or invalid (not a number, or outside what a date
+    can hold), at most MAX_YEARS wide.
+    """
+    current = timezone.localdate().year
+    try:
+        year_to = int(params.get('year_to') or params.get('year') or current)
+        year_from = int(params.get('year_from') or year_to)
+    except ValueError:
+        return current, current
+    if not (date.min.year <= year_from <= date.max.year and date.min.year <= year_to <= date.max.year):
+        return current, current
+    if year_from > year_to:
+        year_from, year_to = year_to, year_from
+    return max(year_from, year_to - MAX_YEARS + 1), year_to
+
+
+def available_years():
+    """Years from the first recorded transaction up to the current one, newest first."""
+    current = timezone.localdate().year
+    firsts = [
+        model.objects.aggregate(first=Min('date'))['first']
+        for model in (Finance, Expense)
+    ]
+    first = min((d.year for d in firsts if d), default=current)
+    return list(range(current, min(first, current) - 1, -1))
+
+
+def _grouped(model, kind, key, start, end):
+    return model.objects.filter(date__range=(start, end))\
+        .annotate(key=key, kind=Value(kind, output_field=IntegerField()))\
+        .values('key', 'kind')\
+        .annotate(total=Sum('amount'))\
+        .order_by()
+
+
+def _build(report_type, start, end):
+    report = REPORTS[report_type]
+    query = _grouped(Finance, INCOME, report.key(), start, end)
+    if report.has_expense:
+        query = query.union(_grouped(Expense, EXPENSE, report.key(), start, end), all=True)
+
+    sums = defaultdict(lambda: {INCOME: Decimal(0), EXPENSE: Decimal(0)})
+    for row in query:
+        # SQLite sums decimals as floats; back to cents
+        sums[row['key']][row['kind']] += (row['total'] or Decimal(0)).quantize(CENT)
+
+    if report.periods:
+        keys = report.periods(start, end)
+    else:
+        # Largest first; income and expense both count towards the size
+        keys = sorted(sums, key=lambda k: sums[k][INCOME] + sums[k][EXPENSE], reverse=True)
+
+    rows = [_row(report, report.label(key), sums[key][INCOME], sums[key][EXPENSE]) for key in keys]
+    totals = _row(report, 'Total', sum(r['income'] for r in rows), sum(r['expense'] or 0 for r in rows))
+    return {
+        'type': report_type,
+        'title': report.title,
+        'key_label': report.key_label,
+        'has_expense': report.has_expense,
+        'year_from': start.year,
+        'year_to': end.year,
+        'rows': rows,
+        'totals': totals,
+    }
+
+
+def _row(report, label, income, expense):
+    if not report.has_expense:
+        return {'label': label, 'income': income, 'expense': None, 'net': None}
+    return {'label': label, 'income': income, 'expense': expense, 'net': income - expense}
+
+
+def run_report(report_type, year_from, year_to):
+    """The `report_type` report (a key of REPORTS) for January year_from .. December year_to."""
+    if report_type not in REPORTS:
+        raise ValueError(f'Unknown report type: {report_type}')
+    start, end = date(year_from, 1, 1), date(year_to, 12, 31)
+    return get_period_snapshot(start, end, lambda: _build(report_type, start, end), name=f'report-{report_type}')
+
+
+def csv_table(result):
+    """(header, rows) of a report for stream_csv; amounts are left unformatted."""
+    header = [result['key_label'], 'Income']
+    if result['has_expense']:
+        header += ['Expense', 'Net']
+    rows = []
+    for row in result['rows'] + [result['totals']]:
+        values = [row['label'], row['income']]
+        if result['has_expense']:
+            values += [row['expense'], row['net']]
+        rows.append(values)
+    return header, rows
@@ -0,0 +1,104 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .models import Attendance, MemberAttendance, Finance, Expense, BankAccount
+from . import stats, finance_summary, balances
+from .checkins import recount_check_ins
+
+
+def invalidate_attendance_stats(sender, **kwargs):
+    stats.invalidate()
+
+
+def lower_check_in_count(sender, instance, **kwargs):
+    # Every way a check-in goes (instance or queryset delete, the cascade from its
+    # Member) sends this; in the cascade from the service itself nothing is left to update
+    attendance_id = instance.attendance_id
+    transaction.on_commit(lambda: Attendance.objects.filter(pk=attendance_id)
+                          .update(checked_in_count=F('checked_in_count') - 1))
+
+
+def invalidate_finance_summary(sender, **kwargs):
+    finance_summary.invalidate()
+
+
+def remember_ledger_entry(sender, instance, **kwargs):
+    # An edit can change the amount or move the row to another account; the old entry is reversed
+    instance._balance_previous_entry = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).first()
+        if previous:
+            instance._balance_previous_entry = balances.ledger_entry(previous)
+
+
+def post_ledger_entry(sender, instance, **kwargs):
+    previous = getattr(instance, '_balance_previous_entry', None)
+    if previous:
+        balances.apply_delta(previous[0], -previous[1])
+    balances.apply_delta(*balances.ledger_entry(instance))
+
+
+def reverse_ledger_entry(sender, instance, **kwargs):
+    account_id, amount = balances.ledger_entry(instance)
+    balances.apply_delta(account_id, -amount)
+
+
+def carry_opening_balance(sender, instance, **kwargs):
+    # current_balance is derived: a new account starts at its opening balance, and
+    # changing the opening balance shifts the stored (not the form's stale) balance
+    if instance.pk is None:
+        instance.current_balance = instance.opening_balance
+        return
+    stored = sender.objects.filter(pk=instance.pk).values('opening_balance', 'current_balance').first()
+    if stored:
+        instance.current_balance = stored['current_balance'] + instance.opening_balance - stored['opening_balance']
+
+
+def _receivers():
+    yield post_save, invalidate_attendance_stats, Attendance, 'attendance_stats_post_save'
+    yield post_delete, invalidate_attendance_stats, Attendance, 'attendance_stats_post_delete'
+    # check_in() bumps the headcounts and lower_check_in_count lowers checked_in_count
+    # with update(); the MemberAttendance save/delete is the signal
+    yield post_delete, lower_check_in_count, MemberAttendance, 'check_in_count_post_delete'
+    yield post_save, invalidate_attendance_stats, MemberAttendance, 'attendance_stats_check_in'
+    yield post_delete, invalidate_attendance_stats, MemberAttendance, 'attendance_stats_check_in_delete'
+    for model in (Finance, Expense):
+        yield post_save, invalidate_finance_summary, model, f'finance_summary_post_save_{model.__name__}'
+        yield post_delete, invalidate_finance_summary, model, f'finance_summary_post_delete_{model.__name__}'
+        yield pre_save, remember_ledger_entry, model, f'balance_pre_save_{model.__name__}'
+        yield post_save, post_ledger_entry, model, f'balance_post_save_{model.__name__}'
+        yield post_delete, reverse_ledger_entry, model, f'balance_post_delete_{model.__name__}'
+    yield pre_save, carry_opening_balance, BankAccount, 'balance_pre_save_BankAccount'
+
+
+def connect():
+    for signal, receiver, model, uid in _receivers():
+        signal.connect(receiver, sender=model, dispatch_uid=uid)
+
+
+def disconnect():
+    for signal, receiver, model, uid in _receivers():
+        signal.disconnect(sender=model, dispatch_uid=uid)
+
+
+@contextmanager
+def bulk_load():
+    """
+    Mute the per-row receivers for mass writes; recount the check-ins, drop the
+    cached stats and rebuild the balances once at the end.
+    """
+    disconnect()
+    try:
+        yield
+    finally:
+        connect()
+        recount_check_ins()
+        stats.invalidate()
+        finance_summary.invalidate()
+        balances.rebuild_balances()
+
+
+connect()
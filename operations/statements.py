@@ -0,0 +1,243 @@
+"""
+Bank statement import and reconciliation. An uploaded CSV or OFX file is
+parsed as a stream and written to the StatementLine staging table in batches;
+the lines are then matched to the account's Finance/Expense entries by signed
+amount and date. The match is a hash join: the ledger entries in the
+statement's date span are bucketed by amount in cents, and each line takes the
+nearest-dated free entry of its bucket within the tolerance.
+"""
+import bisect
+import csv
+import io
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from .ledger import INCOME, EXPENSE
+from .models import Finance, Expense, StatementImport, StatementLine
+
+BATCH_SIZE = 2000
+DATE_TOLERANCE_DAYS = 3
+MAX_DESCRIPTION = 255
+MAX_REFERENCE = 100
+# StatementLine.amount holds 12 digits, 2 of them decimals
+MAX_AMOUNT = Decimal(10) ** 10
+CENT = Decimal('0.01')
+
+# Accepted headers (lower-cased) for each CSV column
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'posted date', 'posting date', 'value date', 'trans date'),
+    'amount': ('amount', 'value', 'transaction amount'),
+    'credit': ('credit', 'credit amount', 'money in', 'paid in', 'deposit', 'deposits'),
+    'debit': ('debit', 'debit amount', 'money out', 'paid out', 'withdrawal', 'withdrawals'),
+    'description': ('description', 'narration', 'details', 'memo', 'payee', 'reference details', 'transaction details'),
+    'reference': ('reference', 'ref', 'transaction id', 'id', 'fitid'),
+}
+CSV_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d %b %Y', '%d-%b-%Y', '%Y/%m/%d')
+
+OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)</STMTTRN>', re.S | re.I)
+# SGML OFX leaves leaf elements unclosed: <TRNAMT>-20.05 up to the next tag or line end
+OFX_FIELD = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+class StatementError(ValueError):
+    """The uploaded file cannot be read as a bank statement."""
+
+
+def _amount(value):
+    text = (value or '').strip().replace(',', '').replace('£', '').replace('$', '').replace('₦', '')
+    if text.startswith('(') and text.endswith(')'):
+        text = '-' + text[1:-1]
+    if not text:
+        return None
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise StatementError(f'"{value}" is not an amount.')
+    if not amount.is_finite():
+        raise StatementError(f'"{value}" is not an amount.')
+    # Before quantizing, which fails on huge values; the half cent covers rounding up to MAX_AMOUNT
+    if abs(amount) >= MAX_AMOUNT - CENT / 2:
+        raise StatementError(f'"{value}" is too large for an amount.')
+    return amount.quantize(CENT)
+
+
+def _csv_date(value):
+    text = (value or '').strip()
+    for fmt in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise StatementError(f'"{value}" is not a date (expected e.g. 2026-01-31 or 31/01/2026).')
+
+
+def parse_csv(lines):
+    """(date, amount, description, reference) of each row of a CSV statement with a header row."""
+    reader = csv.reader(lines)
+    try:
+        header = next(reader, None)
+    except csv.Error as e:
+        raise StatementError(f'Line 1: {e}')
+    if not header:
+        raise StatementError('The CSV file is empty.')
+    names = [h.strip().lower() for h in header]
+    columns = {
+        column: next((names.index(alias) for alias in aliases if alias in names), None)
+        for column, aliases in CSV_COLUMNS.items()
+    }
+    if columns['date'] is None or (columns['amount'] is None and columns['credit'] is None and columns['debit'] is None):
+        raise StatementError('The CSV needs a date column and an amount (or credit/debit) column.')
+
+    def cell(row, column):
+        index = columns[column]
+        return row[index] if index is not None and index < len(row) else ''
+
+    try:
+        for number, row in enumerate(reader, start=2):
+            if not any(c.strip() for c in row):
+                continue
+            try:
+                if columns['amount'] is not None:
+                    amount = _amount(cell(row, 'amount'))
+                else:
+                    amount = (_amount(cell(row, 'credit')) or 0) - abs(_amount(cell(row, 'debit')) or 0)
+                if amount is None:
+                    raise StatementError('the amount is missing.')
+                yield (_csv_date(cell(row, 'date')), amount,
+                       cell(row, 'description').strip()[:MAX_DESCRIPTION], cell(row, 'reference').strip()[:MAX_REFERENCE])
+            except StatementError as e:
+                raise StatementError(f'Line {number}: {e}')
+    except csv.Error as e:
+        # e.g. a NUL byte or an oversized field; reader.line_num is the line it stopped on
+        raise StatementError(f'Line {reader.line_num}: {e}')
+
+
+def parse_ofx(text):
+    """(date, amount, description, reference) of each <STMTTRN> of an OFX/QFX statement (SGML or XML)."""
+    found = False
+    for match in OFX_TRANSACTION.finditer(text):
+        found = True
+        fields = {name.upper(): value.strip() for name, value in OFX_FIELD.findall(match.group(1))}
+        try:
+            posted = datetime.strptime(fields.get('DTPOSTED', '')[:8], '%Y%m%d').date()
+        except ValueError:
+            raise StatementError(f'Transaction {fields.get("FITID", "?")} has no valid DTPOSTED.')
+        amount = _amount(fields.get('TRNAMT'))
+        if amount is None:
+            raise StatementError(f'Transaction {fields.get("FITID", "?")} has no TRNAMT.')
+        description = ' '.join(filter(None, (fields.get('NAME'), fields.get('MEMO'))))
+        yield posted, amount, description[:MAX_DESCRIPTION], fields.get('FITID', '')[:MAX_REFERENCE]
+    if not found:
+        raise StatementError('No <STMTTRN> transactions found in the OFX file.')
+
+
+def parse(uploaded_file):
+    """Rows of an uploaded statement, by file extension: .csv, or .ofx/.qfx."""
+    name = uploaded_file.name.lower()
+    if name.endswith('.csv'):
+        return parse_csv(io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', errors='replace', newline=''))
+    if name.endswith(('.ofx', '.qfx')):
+        # OFX transactions are not line-delimited, so the (small) file is read whole
+        return parse_ofx(uploaded_file.read().decode('utf-8', errors='replace'))
+    raise StatementError('Upload a .csv, .ofx or .qfx file.')
+
+
+def import_statement(account, uploaded_file, user=None):
+    """
+    Stage the statement's lines (in batches, never the whole file in memory as
+    model instances) and match them. A file that fails to parse leaves nothing behind.
+    """
+    with transaction.atomic():
+        statement_import = StatementImport.objects.create(account=account, filename=uploaded_file.name[:255], uploaded_by=user)
+        count = 0
+        batch = []
+        for day, amount, description, reference in parse(uploaded_file):
+            batch.append(StatementLine(
+                statement_import=statement_import, date=day, amount=amount,
+                description=description, reference=reference,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                StatementLine.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            StatementLine.objects.bulk_create(batch)
+            count += len(batch)
+        if not count:
+            raise StatementError('The file has no transactions.')
+        statement_import.line_count = count
+        statement_import.save(update_fields=['line_count'])
+    match_statement(statement_import)
+    return statement_import
+
+
+def _ledger_buckets(account, start, end):
+    """
+    {amount in cents: [(date, kind, id), ...] sorted by date} of the account's
+    entries between start and end that no statement line has claimed yet.
+    Expenses are negative, as they are on the statement.
+    """
+    claimed_finance = StatementLine.objects.filter(matched_finance__isnull=False).values('matched_finance')
+    claimed_expense = StatementLine.objects.filter(matched_expense__isnull=False).values('matched_expense')
+    buckets = defaultdict(list)
+    for model, kind, sign, claimed in ((Finance, INCOME, 1, claimed_finance), (Expense, EXPENSE, -1, claimed_expense)):
+        rows = model.objects.filter(bank_account=account, date__range=(start, end))\
+            .exclude(pk__in=claimed).values_list('date', 'id', 'amount')
+        for day, pk, amount in rows.iterator(chunk_size=BATCH_SIZE):
+            buckets[sign * int(round(amount * 100))].append((day, kind, pk))
+    for entries in buckets.values():
+        entries.sort()
+    return buckets
+
+
+def _take_nearest(entries, day, tolerance):
+    """Remove and return the entry dated nearest to `day` (within `tolerance`), or None."""
+    # entries[i] is the first dated on/after `day`, entries[i - 1] the last before it
+    i = bisect.bisect_left(entries, (day,))
+    best = None
+    for j in (i - 1, i):
+        if 0 <= j < len(entries):
+            gap = abs((entries[j][0] - day).days)
+            if gap <= tolerance.days and (best is None or gap < best[0]):
+                best = (gap, j)
+    return entries.pop(best[1]) if best else None
+
+
+def match_statement(statement_import, tolerance_days=DATE_TOLERANCE_DAYS):
+    """
+    Match the import's unmatched lines to free ledger entries of the same signed
+    amount dated within `tolerance_days`; returns how many lines were matched.
+    One bucketed pass over each side, so 10k lines against years of entries is
+    bounded by the two reads, not by lines x entries.
+    """
+    lines = statement_import.lines.filter(matched_finance__isnull=True, matched_expense__isnull=True)
+    span = lines.aggregate(first=Min('date'), last=Max('date'))
+    if span['first'] is None:
+        return 0
+    tolerance = timedelta(days=tolerance_days)
+    buckets = _ledger_buckets(statement_import.account, span['first'] - tolerance, span['last'] + tolerance)
+
+    matched = []
+    for pk, day, amount in lines.order_by('date', 'id').values_list('id', 'date', 'amount').iterator(chunk_size=BATCH_SIZE):
+        entries = buckets.get(int(round(amount * 100)))
+        entry = _take_nearest(entries, day, tolerance) if entries else None
+        if entry:
+            _, kind, entry_pk = entry
+            matched.append((entry_pk if kind == INCOME else None, entry_pk if kind == EXPENSE else None, pk))
+
+    # One prepared UPDATE run per match; bulk_update's CASE per batch costs more to build than to run
+    table = StatementLine._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(f'UPDATE {table} SET matched_finance_id = %s, matched_expense_id = %s WHERE id = %s', matched)
+    statement_import.matched_count = statement_import.lines.exclude(matched_finance__isnull=True, matched_expense__isnull=True).count()
+    statement_import.save(update_fields=['matched_count'])
+    return len(matched)
+
+
+def unmatched_lines(statement_import):
+    return statement_import.lines.filter(matched_finance__isnull=True, matched_expense__isnull=True).order_by('date', 'id')
@@ -0,0 +1,102 @@
+"""
+Attendance statistics for the attendance list cards and the dashboard: the
+rolling "last N services" averages of each kind of service come from one
+ROW_NUMBER() window query, the month-over-month figures from one conditional
+aggregate. The result is cached for the day and dropped on any Attendance
+write or check-in (operations.signals).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Count, F, Q, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import Attendance
+
+CACHE_PREFIX = 'operations:attendance-stats'
+RECENT_SERVICES = 12
+
+# Kinds of service, matched on service_type the same way as the attendance list tabs
+SERVICE_KINDS = {
+    'sunday': 'Sunday',
+    'midweek': 'Midweek',
+    'special': 'Special',
+}
+OTHER_KIND = 'other'
+
+
+def _cache_key(today):
+    return f'{CACHE_PREFIX}:{today.isoformat()}'
+
+
+def attendance_stats():
+    """Rolling averages and monthly figures as of today, built at most once a day between writes."""
+    today = timezone.localdate()
+    key = _cache_key(today)
+    stats = cache.get(key)
+    if stats is None:
+        stats = {**_recent(), **_months(today)}
+        stats['avg_sunday'] = stats['recent_averages'].get('sunday', 0)
+        # The key carries the date, so a day is plenty
+        cache.set(key, stats, 24 * 60 * 60)
+    return stats
+
+
+def invalidate():
+    # After commit, so a request racing the write cannot cache pre-commit figures for the day
+    transaction.on_commit(lambda: cache.delete(_cache_key(timezone.localdate())))
+
+
+def service_kind():
+    return Case(
+        *(When(service_type__icontains=label, then=Value(kind)) for kind, label in SERVICE_KINDS.items()),
+        default=Value(OTHER_KIND),
+        output_field=CharField(),
+    )
+
+
+def _recent(n=RECENT_SERVICES):
+    """
+    Average headcount over the latest `n` services of each kind, and how many
+    services are recorded in all. Numbering the services of each kind newest
+    first and keeping positions 1..n is what "the last n" means; slicing a
+    queryset and then aggregating it does not limit the aggregate.
+    """
+    rows = Attendance.objects.annotate(
+        kind=service_kind(),
+        position=Window(RowNumber(), partition_by=[service_kind()], order_by=[F('date').desc(), F('id').desc()]),
+        services=Window(Count('id')),
+    ).filter(position__lte=n).values_list('kind', 'total_count', 'services')
+
+    counts = defaultdict(list)
+    services_recorded = 0
+    for kind, total_count, services in rows:
+        counts[kind].append(total_count)
+        services_recorded = services
+    return {
+        'recent_averages': {kind: int(sum(totals) / len(totals)) for kind, totals in counts.items()},
+        'services_recorded': services_recorded,
+    }
+
+
+def _months(today):
+    """Attendance and first-timers this month, and growth on last month's attendance."""
+    month_start = today.replace(day=1)
+    last_month_start = (month_start - timedelta(days=1)).replace(day=1)
+    totals = Attendance.objects.filter(date__gte=last_month_start).aggregate(
+        this_month=Sum('total_count', filter=Q(date__gte=month_start), default=0),
+        last_month=Sum('total_count', filter=Q(date__lt=month_start), default=0),
+        first_timers_month=Sum('first_timers_count', filter=Q(date__gte=month_start), default=0),
+    )
+    growth_rate = 0
+    if totals['last_month'] > 0:
+        growth_rate = (totals['this_month'] - totals['last_month']) / totals['last_month'] * 100
+    return {
+        'attendance_month': totals['this_month'],
+        'attendance_last_month': totals['last_month'],
+        'first_timers_month': totals['first_timers_month'],
+        'growth_rate': round(growth_rate, 1),
+    }
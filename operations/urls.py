@@ -1,9 +1,11 @@
 from django.urls import path
 from .views import (
     AttendanceListView, AttendanceCreateView, AttendanceUpdateView, AttendanceDeleteView,
-    FinancialDashboardView, IncomeListView, IncomeCreateView, ExpenseListView, ExpenseCreateView, FinancialReportView,
-    LedgerView, BankAccountListView, BankAccountCreateView, BankAccountUpdateView,
-    BudgetListView, BudgetCreateView, BudgetUpdateView,
+    KioskCheckInView, KioskReplayView,
+    FinancialDashboardView, IncomeListView, IncomeCreateView, ExpenseListView, ExpenseCreateView, FinancialReportView, FinancialReportExportView,
+    LedgerView, IncomeExportView, ExpenseExportView, LedgerExportView, BankAccountListView, BankAccountCreateView, BankAccountUpdateView, BankAccountStatementView,
+    StatementImportView, StatementImportDetailView,
+    BudgetListView, BudgetCreateView, BudgetUpdateView, BudgetAlertView,
     CommunityImpactListView, CommunityImpactCreateView,
     AnnouncementListView, AnnouncementCreateView
 )
@@ -13,25 +15,37 @@ urlpatterns = [
     path('attendance/create/', AttendanceCreateView.as_view(), name='attendance-create'),
     path('attendance/<int:pk>/update/', AttendanceUpdateView.as_view(), name='attendance-update'),
     path('attendance/<int:pk>/delete/', AttendanceDeleteView.as_view(), name='attendance-delete'),
+    path('attendance/<int:pk>/check-in/', KioskCheckInView.as_view(), name='attendance-kiosk-check-in'),
+    path('attendance/check-in/replay/', KioskReplayView.as_view(), name='attendance-kiosk-replay'),
     
     # Financial Management
     path('', FinancialDashboardView.as_view(), name='financial-dashboard'),
     path('income/', IncomeListView.as_view(), name='financial-income-list'),
     path('income/new/', IncomeCreateView.as_view(), name='financial-income-create'),
+    path('income/export/', IncomeExportView.as_view(), name='financial-income-export'),
     path('expense/', ExpenseListView.as_view(), name='financial-expense-list'),
     path('expense/new/', ExpenseCreateView.as_view(), name='financial-expense-create'),
+    path('expense/export/', ExpenseExportView.as_view(), name='financial-expense-export'),
     path('reports/', FinancialReportView.as_view(), name='financial-reports'),
+    path('reports/export/', FinancialReportExportView.as_view(), name='financial-report-export'),
     path('ledger/', LedgerView.as_view(), name='financial-ledger'),
+    path('ledger/export/', LedgerExportView.as_view(), name='financial-ledger-export'),
     
     # Bank Accounts
     path('accounts/', BankAccountListView.as_view(), name='bank-account-list'),
     path('accounts/new/', BankAccountCreateView.as_view(), name='bank-account-create'),
     path('accounts/<int:pk>/edit/', BankAccountUpdateView.as_view(), name='bank-account-edit'),
+    path('accounts/<int:pk>/statement/', BankAccountStatementView.as_view(), name='bank-account-statement'),
+
+    # Statement reconciliation
+    path('statements/', StatementImportView.as_view(), name='statement-import'),
+    path('statements/<int:pk>/', StatementImportDetailView.as_view(), name='statement-import-detail'),
 
     # Budgets
     path('budgets/', BudgetListView.as_view(), name='budget-list'),
     path('budgets/new/', BudgetCreateView.as_view(), name='budget-create'),
     path('budgets/<int:pk>/edit/', BudgetUpdateView.as_view(), name='budget-edit'),
+    path('budgets/alerts/', BudgetAlertView.as_view(), name='budget-alerts'),
 
     # Community Impact
     path('impact/', CommunityImpactListView.as_view(), name='impact-list'),
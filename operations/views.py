@@ -1,15 +1,31 @@
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView, DetailView
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView, DetailView, View
+from django.db import IntegrityError, transaction
 from django.db.models import Avg, Sum, Count, Q, Value, CharField
 from django.utils import timezone
 from django.http import JsonResponse
 from django.urls import reverse_lazy
+from django.core.paginator import Paginator
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models.functions import TruncMonth
-from .models import Attendance, Finance, Expense, BankAccount, Budget, CommunityImpact, Announcement
+from .models import Attendance, Finance, Expense, BankAccount, Budget, CommunityImpact, Announcement, StatementImport
 from ministry.models import Service, Event
 from people.models import Member
-from .forms import AttendanceForm, IncomeForm, ExpenseForm
-from datetime import timedelta
+from .forms import AttendanceForm, IncomeForm, ExpenseForm, StatementUploadForm
+from .ledger import ledger_page, ledger_union, apply_transaction_filters
+from .exports import stream_csv, EXPORT_CHUNK_SIZE
+from .checkins import resolve_members, bulk_check_in
+from analytics.signals import refresh_attendance
+from .stats import attendance_stats, invalidate as invalidate_attendance_stats
+from .finance_summary import finance_summary
+from .reports import REPORTS, parse_years, available_years, run_report, csv_table
+from .budgets import budget_utilization, as_row as as_budget_row, alerts as budget_alerts
+from .balances import statement as account_statement
+from .statements import StatementError, import_statement, match_statement, unmatched_lines
+from rest_framework import serializers, views, permissions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework.response import Response
+from datetime import date, timedelta
 import json
 from django.shortcuts import render, get_object_or_404, redirect
 
@@ -52,35 +68,7 @@ class AttendanceListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Stats Calculation
-        now = timezone.now().date()
-        month_start = now.replace(day=1)
-        last_month_start = (month_start - timedelta(days=1)).replace(day=1)
-        
-        # Avg Sunday Attendance (Last 12 Sundays)
-        recent_sundays = Attendance.objects.filter(service_type__icontains='Sunday').order_by('-date')[:12]
-        avg_sunday = recent_sundays.aggregate(avg=Avg('total_count'))['avg'] or 0
-        
-        # First Timers (This Month)
-        ft_this_month = Attendance.objects.filter(date__gte=month_start).aggregate(sum=Sum('first_timers_count'))['sum'] or 0
-        
-        # Growth Rate (This Month vs Last Month Total Attendance)
-        att_this_month = Attendance.objects.filter(date__gte=month_start).aggregate(sum=Sum('total_count'))['sum'] or 0
-        att_last_month = Attendance.objects.filter(date__gte=last_month_start, date__lt=month_start).aggregate(sum=Sum('total_count'))['sum'] or 0
-        
-        growth_rate = 0
-        if att_last_month > 0:
-            growth_rate = ((att_this_month - att_last_month) / att_last_month) * 100
-            
-        # Services Recorded (Total count)
-        services_count = Attendance.objects.count()
-
-        context['stats'] = {
-            'avg_sunday': int(avg_sunday),
-            'first_timers_month': int(ft_this_month),
-            'growth_rate': round(growth_rate, 1),
-            'services_recorded': services_count
-        }
+        context['stats'] = attendance_stats()
         
         # Pass filters back to context
         context['current_tab'] = self.request.GET.get('type', 'all')
@@ -92,13 +80,28 @@ class AttendanceListView(ListView):
         return context
 
 
+def _save_attendance(form):
+    """
+    form.save(), or None with a form error when the service already has a record
+    that day. The form leaves `service` out, so Django skips the unique constraints
+    that mention it and only the database catches the duplicate.
+    """
+    try:
+        with transaction.atomic():
+            return form.save()
+    except IntegrityError:
+        form.add_error(None, 'This service already has an attendance record for that date.')
+        return None
+
 class AttendanceCreateView(CreateView):
     model = Attendance
     fields = ['date', 'service_type', 'adult_count', 'children_count', 'first_timers_count', 'parish', 'ministry', 'event']
     success_url = reverse_lazy('attendance-list')
 
     def form_valid(self, form):
-        self.object = form.save()
+        self.object = _save_attendance(form)
+        if self.object is None:
+            return self.form_invalid(form)
         if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': True,
@@ -130,7 +133,9 @@ class AttendanceUpdateView(UpdateView):
     success_url = reverse_lazy('attendance-list')
 
     def form_valid(self, form):
-        self.object = form.save()
+        self.object = _save_attendance(form)
+        if self.object is None:
+            return self.form_invalid(form)
         if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': True,
@@ -173,27 +178,102 @@ class AttendanceDeleteView(DeleteView):
 
 # --- FINANCIAL MANAGEMENT ---
 
+# --- Kiosk check-in (ushers' tablets; JWT like the rest of the API) ---
+
+KIOSK_MAX_BATCH = 1000
+
+
+class KioskCheckInSerializer(serializers.Serializer):
+    members = serializers.ListField(child=serializers.IntegerField(), required=False, default=list, max_length=KIOSK_MAX_BATCH)
+    tokens = serializers.ListField(child=serializers.CharField(), required=False, default=list, max_length=KIOSK_MAX_BATCH)
+    phones = serializers.ListField(child=serializers.CharField(), required=False, default=list, max_length=KIOSK_MAX_BATCH)
+
+
+class KioskReplayItemSerializer(serializers.Serializer):
+    attendance = serializers.IntegerField()
+    member = serializers.IntegerField(required=False)
+    token = serializers.CharField(required=False)
+    phone = serializers.CharField(required=False)
+    checked_in_at = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if len({'member', 'token', 'phone'} & set(data)) != 1:
+            raise serializers.ValidationError('Give exactly one of member, token or phone.')
+        return data
+
+
+class KioskReplaySerializer(serializers.Serializer):
+    items = KioskReplayItemSerializer(many=True, max_length=KIOSK_MAX_BATCH)
+
+
+def _kiosk_batch(attendance, members=(), tokens=(), phones=(), times=None):
+    """Resolve and check in one batch for `attendance`; `times` maps identifiers to scan times."""
+    times = times or {}
+    resolved, unresolved = resolve_members(members, tokens, phones)
+    checked_in, duplicates = bulk_check_in(attendance, [(m, times.get(key)) for key, m in resolved.items()])
+    if checked_in:
+        refresh_attendance(attendance)
+        invalidate_attendance_stats()
+    return {
+        'attendance': attendance.pk,
+        'checked_in': checked_in,
+        'already_checked_in': duplicates,
+        'unresolved': unresolved,
+    }
+
+
+class KioskCheckInView(views.APIView):
+    """POST {members: [ids], tokens: [QR values], phones: [numbers]} for one service."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        attendance = get_object_or_404(Attendance, pk=pk)
+        serializer = KioskCheckInSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(_kiosk_batch(attendance, **serializer.validated_data))
+
+
+class KioskReplayView(views.APIView):
+    """
+    Offline queue upload: POST {items: [{attendance, member|token|phone, checked_in_at}]}
+    as scanned while the tablet was offline. Items are grouped per service and each
+    group goes through the same batch path; replaying a queue twice is harmless.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = KioskReplaySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        groups = {}
+        for item in serializer.validated_data['items']:
+            group = groups.setdefault(item['attendance'], {'members': [], 'tokens': [], 'phones': [], 'times': {}})
+            for kind, key in (('member', 'members'), ('token', 'tokens'), ('phone', 'phones')):
+                if kind in item:
+                    group[key].append(item[kind])
+                    group['times'].setdefault((kind, item[kind]), item.get('checked_in_at'))
+
+        services = Attendance.objects.in_bulk(list(groups))
+        results = []
+        for pk, group in groups.items():
+            if pk not in services:
+                results.append({'attendance': pk, 'error': 'Attendance record not found'})
+                continue
+            results.append(_kiosk_batch(services[pk], **group))
+        return Response({'results': results})
+
+
 class FinancialDashboardView(LoginRequiredMixin, TemplateView):
     template_name = "operations/financial_dashboard_v9.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # 1. Calculate Aggregates
-        now = timezone.now()
-        current_year = now.year
-        current_month = now.month
-        context['current_month_name'] = now.strftime('%B')
-        
-        income_ytd = Finance.objects.filter(date__year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-        expense_ytd = Expense.objects.filter(date__year=current_year).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        income_month = Finance.objects.filter(date__year=current_year, date__month=current_month).aggregate(Sum('amount'))['amount__sum'] or 0
-        expense_month = Expense.objects.filter(date__year=current_year, date__month=current_month).aggregate(Sum('amount'))['amount__sum'] or 0
+        summary = finance_summary()
+        income, expense = summary['income'], summary['expense']
+        context['current_month_name'] = timezone.localdate().strftime('%B')
         
-        net_income = income_ytd - expense_ytd
-        
-        # 2. Format Strings (Logic moved to backend)
+        # Format Strings (Logic moved to backend)
         def fmt(val):
             try:
                 v = float(val)
@@ -214,82 +294,84 @@ class FinancialDashboardView(LoginRequiredMixin, TemplateView):
             except:
                 return "0"
 
-        context['fmt_income_ytd'] = fmt(income_ytd)
-        context['fmt_expense_ytd'] = fmt(expense_ytd)
-        context['fmt_net_income'] = fmt(net_income)
-        context['fmt_income_month'] = fmt(income_month)
-        context['fmt_expense_month'] = fmt(expense_month)
-        
-        eff = 0
-        if income_ytd > 0:
-            eff = (expense_ytd / income_ytd) * 100
-        context['fmt_efficiency'] = f"{eff:.1f}"
-        
-        context['is_net_positive'] = (net_income >= 0)
-        
-        # 3. Recent Transactions (Combined)
-        inflows = Finance.objects.all().annotate(
-            type=Value('Income', output_field=CharField())
-        ).order_by('-date')[:10]
-        
-        outflows = Expense.objects.all().annotate(
-            type=Value('Expense', output_field=CharField())
-        ).order_by('-date')[:10]
-        
-        from itertools import chain
-        from operator import attrgetter
-        
-        # Combine and Sort (Top 10 most recent)
-        recent_transactions = sorted(
-            chain(inflows, outflows),
-            key=attrgetter('date'),
-            reverse=True
-        )[:10]
-
-        context['recent_transactions'] = recent_transactions
+        context['fmt_income_ytd'] = fmt(income['ytd'])
+        context['fmt_expense_ytd'] = fmt(expense['ytd'])
+        context['fmt_net_income'] = fmt(summary['net_ytd'])
+        context['fmt_income_month'] = fmt(income['mtd'])
+        context['fmt_expense_month'] = fmt(expense['mtd'])
+        context['fmt_efficiency'] = f"{summary['efficiency']:.1f}"
+        context['is_net_positive'] = (summary['net_ytd'] >= 0)
+        # Percent change on the same stretch of last year (None: nothing to compare with)
+        context['income_ytd_change'] = income['ytd_change']
+        context['expense_ytd_change'] = expense['ytd_change']
+        
+        # Recent Transactions (Combined, newest first)
+        context['recent_transactions'] = summary['recent']
         return context
 
 # --- LEDGER & RELATED TABLES ---
 
 class LedgerView(LoginRequiredMixin, TemplateView):
     template_name = "operations/ledger.html"
+    page_size = 50
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        q = self.request.GET.get('q', '')
-        
-        # Fetch all records
-        inflows = Finance.objects.all()
-        outflows = Expense.objects.all()
-
-        if q:
-            inflows = inflows.filter(
-                Q(category__icontains=q) | 
-                Q(description__icontains=q) |
-                Q(member__first_name__icontains=q) |
-                Q(member__last_name__icontains=q)
-            )
-            outflows = outflows.filter(
-                Q(category__icontains=q) | 
-                Q(description__icontains=q)
-            )
-
-        inflows = inflows.annotate(type=Value('Income', output_field=CharField()))
-        outflows = outflows.annotate(type=Value('Expense', output_field=CharField()))
-        
-        # Combine and Sort
-        from itertools import chain
-        from operator import attrgetter
         
-        transactions = sorted(
-            chain(inflows, outflows),
-            key=attrgetter('date'),
-            reverse=True
+        # Database-side UNION of inflows & outflows with keyset (cursor) pagination
+        transactions, newer, older = ledger_page(
+            self.request.GET,
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+            size=self.page_size,
         )
         
         context['transactions'] = transactions
+        context['newer_cursor'] = newer
+        context['older_cursor'] = older
         return context
 
+class StatementImportView(LoginRequiredMixin, View):
+    """Upload a bank statement; its lines are staged and matched against the ledger."""
+    template_name = "operations/statement_import.html"
+
+    def render(self, request, form):
+        imports = StatementImport.objects.select_related('account').order_by('-created_at')[:20]
+        return render(request, self.template_name, {'form': form, 'imports': imports})
+
+    def get(self, request):
+        return self.render(request, StatementUploadForm())
+
+    def post(self, request):
+        form = StatementUploadForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return self.render(request, form)
+        try:
+            statement_import = import_statement(form.cleaned_data['account'], form.cleaned_data['file'], request.user)
+        except StatementError as e:
+            form.add_error('file', str(e))
+            return self.render(request, form)
+        return redirect('statement-import-detail', pk=statement_import.pk)
+
+class StatementImportDetailView(LoginRequiredMixin, DetailView):
+    """The lines of an import that matched no ledger entry."""
+    model = StatementImport
+    template_name = "operations/statement_import_detail.html"
+    context_object_name = "statement_import"
+    paginate_by = 50
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        paginator = Paginator(unmatched_lines(self.object), self.paginate_by)
+        ctx['page_obj'] = paginator.get_page(self.request.GET.get('page'))
+        ctx['unmatched_count'] = self.object.line_count - self.object.matched_count
+        return ctx
+
+    def post(self, request, pk):
+        # Re-run matching, e.g. after the missing entries were added to the ledger
+        match_statement(get_object_or_404(StatementImport, pk=pk))
+        return redirect('statement-import-detail', pk=pk)
+
 class BankAccountListView(LoginRequiredMixin, ListView):
     model = BankAccount
     template_name = "operations/bank_account_list.html"
@@ -301,13 +383,39 @@ class BankAccountListView(LoginRequiredMixin, ListView):
 class BankAccountCreateView(LoginRequiredMixin, CreateView):
     model = BankAccount
     template_name = "operations/bank_account_form.html"
-    fields = ['name', 'account_number', 'bank_name', 'currency', 'current_balance']
+    fields = ['name', 'account_number', 'bank_name', 'currency', 'opening_balance']
     success_url = reverse_lazy('bank-account-list')
 
+class BankAccountStatementView(LoginRequiredMixin, DetailView):
+    model = BankAccount
+    template_name = "operations/bank_account_statement.html"
+    context_object_name = "account"
+
+    def get_period(self):
+        """?date_from=&date_to= (YYYY-MM-DD), by default the last 90 days."""
+        today = timezone.localdate()
+        try:
+            date_to = date.fromisoformat(self.request.GET.get('date_to', ''))
+        except ValueError:
+            date_to = today
+        try:
+            date_from = date.fromisoformat(self.request.GET.get('date_from', ''))
+        except ValueError:
+            date_from = date_to - timedelta(days=89)
+        return min(date_from, date_to), date_to
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        date_from, date_to = self.get_period()
+        # Running balances come from one SUM() window over the account's ledger (see operations.balances)
+        ctx['statement'] = account_statement(self.object, date_from, date_to)
+        ctx['filters'] = {'date_from': date_from.isoformat(), 'date_to': date_to.isoformat()}
+        return ctx
+
 class BankAccountUpdateView(LoginRequiredMixin, UpdateView):
     model = BankAccount
     template_name = "operations/bank_account_form.html"
-    fields = ['name', 'account_number', 'bank_name', 'currency', 'current_balance']
+    fields = ['name', 'account_number', 'bank_name', 'currency', 'opening_balance']
     success_url = reverse_lazy('bank-account-list')
 
 class BudgetListView(LoginRequiredMixin, ListView):
@@ -316,15 +424,28 @@ class BudgetListView(LoginRequiredMixin, ListView):
     context_object_name = "budgets"
 
     def get_queryset(self):
-        return Budget.objects.all().order_by('year', 'category')
+        # Spend per budget comes from one correlated subquery (see operations.budgets)
+        return budget_utilization().order_by('year', 'category')
         
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Calculate utilization for each budget
-        # This is a bit complex without aggregation, ensuring we match category and year
-        # For MVP, we pass simple objects. Advanced: annotate actual spent
+        today = timezone.localdate()
+        context['budgets'] = [as_budget_row(b, today) for b in context['budgets']]
         return context
 
+class BudgetAlertView(views.APIView):
+    """Budgets of ?year= (default this year) over, or projected to run over, their allocation."""
+    # Called with a JWT and from the /finance/ pages with the login session
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            year = int(request.query_params.get('year', timezone.localdate().year))
+        except ValueError:
+            return Response({'detail': 'year must be a number.'}, status=400)
+        return Response({'year': year, 'alerts': budget_alerts(year)})
+
 class BudgetCreateView(LoginRequiredMixin, CreateView):
     model = Budget
     template_name = "operations/budget_form.html"
@@ -346,15 +467,7 @@ class IncomeListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        date_from = self.request.GET.get('date_from')
-        date_to = self.request.GET.get('date_to')
-        category = self.request.GET.get('category')
-        
-        if date_from: qs = qs.filter(date__gte=date_from)
-        if date_to: qs = qs.filter(date__lte=date_to)
-        if category: qs = qs.filter(category__icontains=category)
-        
+        qs = apply_transaction_filters(super().get_queryset(), self.request.GET)
         return qs.order_by('-date')
 
     def get_context_data(self, **kwargs):
@@ -380,15 +493,7 @@ class ExpenseListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        qs = super().get_queryset()
-        date_from = self.request.GET.get('date_from')
-        date_to = self.request.GET.get('date_to')
-        category = self.request.GET.get('category')
-        
-        if date_from: qs = qs.filter(date__gte=date_from)
-        if date_to: qs = qs.filter(date__lte=date_to)
-        if category: qs = qs.filter(category__icontains=category)
-        
+        qs = apply_transaction_filters(super().get_queryset(), self.request.GET)
         return qs.order_by('-date')
 
     def get_context_data(self, **kwargs):
@@ -402,31 +507,59 @@ class ExpenseCreateView(LoginRequiredMixin, CreateView):
     template_name = "operations/form_modal.html"
     success_url = reverse_lazy('financial-expense-list')
 
+# --- EXPORTS (streamed CSV, same filters as the list views) ---
+
+class IncomeExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        qs = apply_transaction_filters(Finance.objects.all(), request.GET).order_by('-date', '-id')
+        rows = qs.values_list(
+            'date', 'category', 'amount', 'description',
+            'member__first_name', 'member__last_name', 'parish__name', 'bank_account__name'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv(
+            'income.csv',
+            ['Date', 'Category', 'Amount', 'Description', 'Member First Name', 'Member Last Name', 'Parish', 'Bank Account'],
+            rows,
+        )
+
+class ExpenseExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        qs = apply_transaction_filters(Expense.objects.all(), request.GET).order_by('-date', '-id')
+        rows = qs.values_list(
+            'date', 'category', 'amount', 'description', 'bank_account__name'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        return stream_csv('expenses.csv', ['Date', 'Category', 'Amount', 'Description', 'Bank Account'], rows)
+
+class LedgerExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        rows = (
+            (r['date'], r['type'], r['category'], r['amount'] if r['kind'] else -r['amount'], r['description'])
+            for r in ledger_union(request.GET).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return stream_csv('ledger.csv', ['Date', 'Type', 'Category', 'Amount', 'Description'], rows)
+
 class FinancialReportView(LoginRequiredMixin, TemplateView):
     template_name = "operations/financial_reports_v6.html"
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        report_type = self.request.GET.get('type', 'pnl') # pnl, monthly, category
-        year = int(self.request.GET.get('year', timezone.now().year))
+        report_type = self.request.GET.get('type', 'pnl')
+        if report_type not in REPORTS:
+            report_type = 'pnl'
+        year_from, year_to = parse_years(self.request.GET)
         
-        ctx['year'] = year
         ctx['report_type'] = report_type
-        
-        # Boolean flags for logic-less template
-        ctx['is_pnl'] = (report_type == 'pnl')
-        ctx['is_monthly'] = (report_type == 'monthly')
-        
-        # Boolean flags for years (simple approach for now)
-        ctx['is_2024'] = (year == 2024)
-        ctx['is_2025'] = (year == 2025)
-        ctx['is_2026'] = (year == 2026)
-        
-        start_date = timezone.datetime(year, 1, 1)
-        end_date = timezone.datetime(year, 12, 31)
+        ctx['report_choices'] = [(key, r.title, key == report_type) for key, r in REPORTS.items()]
+        ctx['year_from'] = year_from
+        ctx['year_to'] = year_to
+        ctx['year_choices'] = [
+            {'year': y, 'is_from': y == year_from, 'is_to': y == year_to} for y in available_years()
+        ]
         
         # Format Helper
         def fmt_curr(val):
+            if val is None:
+                return ""
             try:
                 v = float(val)
                 is_neg = v < 0
@@ -436,39 +569,31 @@ class FinancialReportView(LoginRequiredMixin, TemplateView):
             except:
                 return "£0.00"
 
-        if report_type == 'pnl':
-            # Simple P&L Aggregate
-            income = Finance.objects.filter(date__year=year).aggregate(total=Sum('amount'))['total'] or 0
-            expense = Expense.objects.filter(date__year=year).aggregate(total=Sum('amount'))['total'] or 0
-            net = income - expense
-            ctx['pnl'] = {
-                'income': fmt_curr(income),
-                'expense': fmt_curr(expense),
-                'net': fmt_curr(net),
-                'is_net_positive': net >= 0
+        def fmt_row(row):
+            return {
+                'label': row['label'],
+                'income': fmt_curr(row['income']),
+                'expense': fmt_curr(row['expense']),
+                'net': fmt_curr(row['net']),
+                'is_net_positive': row['net'] is None or row['net'] >= 0,
             }
-            
-        elif report_type == 'monthly':
-            # Monthly Breakdown
-            income_qs = Finance.objects.filter(date__year=year).annotate(month=TruncMonth('date')).values('month').annotate(total=Sum('amount')).order_by('month')
-            expense_qs = Expense.objects.filter(date__year=year).annotate(month=TruncMonth('date')).values('month').annotate(total=Sum('amount')).order_by('month')
-            
-            # Merge into a list of 12 months
-            data = []
-            for i in range(1, 13):
-                m_date = timezone.datetime(year, i, 1).date()
-                inc = next((item['total'] for item in income_qs if item['month'].month == i), 0)
-                exp = next((item['total'] for item in expense_qs if item['month'].month == i), 0)
-                net = inc - exp
-                data.append({
-                    'month_name': m_date.strftime('%B'),
-                    'income': fmt_curr(inc),
-                    'expense': fmt_curr(exp),
-                    'net': fmt_curr(net),
-                    'is_net_positive': net >= 0
-                })
-            ctx['monthly_data'] = data
-            
+
+        # One grouped query per report, cached per year range (see operations.reports)
+        report = run_report(report_type, year_from, year_to)
+        ctx['report'] = report
+        ctx['is_pnl'] = (report_type == 'pnl')
+        ctx['rows'] = [fmt_row(row) for row in report['rows']]
+        ctx['totals'] = fmt_row(report['totals'])
+        return ctx
+
+class FinancialReportExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        report_type = request.GET.get('type', 'pnl')
+        if report_type not in REPORTS:
+            report_type = 'pnl'
+        year_from, year_to = parse_years(request.GET)
+        header, rows = csv_table(run_report(report_type, year_from, year_to))
+        return stream_csv(f'{report_type}-{year_from}-{year_to}.csv', header, rows)
 
 # --- COMMUNITY IMPACT ---
 
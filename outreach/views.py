@@ -2,9 +2,9 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, CreateView, UpdateView, DetailView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
-from django.db.models import Q
 from .models import Visitor, FollowUpLog
 from people.models import Member
+from search.index import filter_matching
 from django.utils import timezone
 
 class VisitorListView(LoginRequiredMixin, ListView):
@@ -18,12 +18,7 @@ class VisitorListView(LoginRequiredMixin, ListView):
         status = self.request.GET.get('status')
         
         if q:
-            queryset = queryset.filter(
-                Q(first_name__icontains(q)) | 
-                Q(last_name__icontains(q)) | 
-                Q(phone__icontains(q)) |
-                Q(email__icontains(q))
-            )
+            queryset = filter_matching(queryset, q)
         
         if status:
             queryset = queryset.filter(status=status)
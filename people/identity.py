@@ -0,0 +1,48 @@
+"""
+Which Member the signed-in user is.
+
+The answer is the `User.member` link. Accounts that predate the link are
+matched on email (the first member with that address no other account has
+claimed), and the match is saved to the user so it is never searched for
+again. Only that positive link is stored: an account with no member yet
+repeats the (indexed) email lookup, so the portal appears as soon as staff
+create or correct the member record.
+"""
+from django.db import IntegrityError, transaction
+
+from .models import Member
+
+def current_member(request):
+    """The signed-in user's Member, or None; resolved once per request."""
+    try:
+        return request._current_member
+    except AttributeError:
+        request._current_member = _resolve(request)
+        return request._current_member
+
+
+def _resolve(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    if user.member_id:
+        return user.member
+    if not user.email:
+        return None
+    return link_by_email(user)
+
+
+def link_by_email(user):
+    """Attach the unclaimed member sharing the user's email to the user; returns it or None."""
+    member = Member.objects.filter(email=user.email, staff_account__isnull=True).order_by('pk').first()
+    if member is None:
+        return None
+    user.member = member
+    try:
+        with transaction.atomic():
+            user.save(update_fields=['member'])
+    except IntegrityError:
+        # Another account claimed this member in the meantime
+        user.member = None
+        return None
+    return member
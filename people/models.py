@@ -45,6 +45,17 @@ class Member(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'member_type'], name='member_status_type_idx'),
+            # "New guests/converts this month" counts, and the type breakdown
+            models.Index(fields=['member_type', 'created_at'], name='member_type_created_idx'),
+            models.Index(fields=['created_at'], name='member_created_idx'),
+            models.Index(fields=['membership_date'], name='member_membership_date_idx'),
+            # Signed-in user -> member record lookups
+            models.Index(fields=['email'], name='member_email_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
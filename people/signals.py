@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
+
+from .models import Member
+from . import stats
+
+
+def invalidate_member_stats(sender, **kwargs):
+    stats.invalidate()
+
+
+def _receivers():
+    yield post_save, invalidate_member_stats, Member, 'member_stats_post_save'
+    yield post_delete, invalidate_member_stats, Member, 'member_stats_post_delete'
+
+
+def connect():
+    for signal, receiver, model, uid in _receivers():
+        signal.connect(receiver, sender=model, dispatch_uid=uid)
+
+
+def disconnect():
+    for signal, receiver, model, uid in _receivers():
+        signal.disconnect(sender=model, dispatch_uid=uid)
+
+
+@contextmanager
+def bulk_load():
+    """Mute the per-row cache invalidation for mass writes and drop the stats once at the end."""
+    disconnect()
+    try:
+        yield
+    finally:
+        connect()
+        stats.invalidate()
+
+
+connect()
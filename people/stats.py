@@ -0,0 +1,90 @@
+"""
+Member statistics for the member list cards and the api/stats endpoint: the
+counters come from one conditional-aggregation query and the chart
+distributions from one grouped pass. The result is cached for the day and
+dropped on any Member write (people.signals).
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, DateField, Q, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Member
+
+CACHE_PREFIX = 'people:member-stats'
+GROWTH_DAYS = 180
+TOP_MINISTRIES = 5
+
+
+def _cache_key(today):
+    return f'{CACHE_PREFIX}:{today.isoformat()}'
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def member_stats():
+    """{'cards': {...}, 'charts': {...}} as of today, built at most once a day between writes."""
+    today = timezone.localdate()
+    key = _cache_key(today)
+    stats = cache.get(key)
+    if stats is None:
+        stats = {'cards': _cards(today), 'charts': _charts(today)}
+        # The key carries the date, so a day is plenty
+        cache.set(key, stats, 24 * 60 * 60)
+    return stats
+
+
+def invalidate():
+    # After commit, so a request racing the write cannot cache pre-commit figures for the day
+    transaction.on_commit(lambda: cache.delete(_cache_key(timezone.localdate())))
+
+
+def _cards(today):
+    month_start = today.replace(day=1)
+    joined_this_month = timezone.make_aware(datetime.combine(month_start, time.min))
+    cards = Member.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+        new_this_month=Count('id', filter=Q(membership_date__gte=month_start, membership_date__lt=_next_month(month_start))),
+        guests=Count('id', filter=Q(member_type='Guest')),
+        workers=Count('id', filter=Q(member_type='Worker')),
+        first_timers_month=Count('id', filter=Q(member_type='Guest', created_at__gte=joined_this_month)),
+        new_converts_month=Count('id', filter=Q(member_type='New Convert', created_at__gte=joined_this_month)),
+    )
+    # Share of members who are active
+    cards['retention_rate'] = int(cards['active'] / cards['total'] * 100) if cards['total'] else 0
+    return cards
+
+
+def _charts(today):
+    growth_since = today - timedelta(days=GROWTH_DAYS)
+    # Membership month only for recent joiners; everyone else groups under None
+    recent_month = Case(
+        When(membership_date__gte=growth_since, then=TruncMonth('membership_date')),
+        output_field=DateField(),
+    )
+    rows = Member.objects.annotate(month=recent_month)\
+        .values('member_type', 'status', 'ministry__name', 'month')\
+        .annotate(n=Count('id'))\
+        .order_by()
+
+    types, statuses, ministries, growth = Counter(), Counter(), Counter(), Counter()
+    for row in rows:
+        types[row['member_type']] += row['n']
+        statuses[row['status']] += row['n']
+        ministries[row['ministry__name'] or 'Unassigned'] += row['n']
+        if row['month']:
+            growth[row['month']] += row['n']
+
+    return {
+        'growth': [{'month': month.strftime('%Y-%m'), 'count': n} for month, n in sorted(growth.items())],
+        'typeDist': [{'name': name, 'value': n} for name, n in sorted(types.items())],
+        'statusDist': [{'name': name, 'value': n} for name, n in sorted(statuses.items())],
+        'ministryDist': [{'name': name, 'value': n} for name, n in ministries.most_common(TOP_MINISTRIES)],
+    }
@@ -1,9 +1,11 @@
 from rest_framework import serializers, generics, views
 from rest_framework.response import Response
-from django.db.models import Count, Q
-from django.db.models.functions import TruncMonth
+from django.db.models import Count
 from django.utils import timezone
 from .models import Member, Volunteer, Family
+from .identity import current_member
+from .stats import member_stats
+from search.index import filter_matching
 from ministry.models import Ministry
 
 class MemberSerializer(serializers.ModelSerializer):
@@ -16,9 +18,9 @@ from django.views.generic import TemplateView, ListView, CreateView, UpdateView,
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy, reverse
 from django.shortcuts import redirect, render, get_object_or_404
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 import json
 import stripe
 
@@ -34,9 +36,7 @@ class MemberPortalView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         user = self.request.user
         
-        # specific member matching logic (e.g. by email)
-        # Fallback to first member for demo if no match
-        member = Member.objects.filter(email=user.email).first() or Member.objects.first()
+        member = current_member(self.request)
         
         context['member'] = member
         context['user_name'] = user.first_name or user.username
@@ -71,6 +71,7 @@ from django.views.decorators.http import require_POST
 from django.utils import timezone
 from django.http import JsonResponse
 from operations.models import Attendance, MemberAttendance
+from operations.checkins import check_in, service_attendance
 from ministry.models import Service, Ministry
 
 @require_POST
@@ -78,12 +79,9 @@ def mark_attendance(request):
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'message': 'Please login first'}, status=401)
         
-    member = Member.objects.filter(email=request.user.email).first()
+    member = current_member(request)
     if not member:
-        # Fallback for demo: use first member if emails don't match (for admin testing)
-        member = Member.objects.first()
-        if not member:
-             return JsonResponse({'success': False, 'message': 'Member profile not found'}, status=404)
+        return JsonResponse({'success': False, 'message': 'No member profile is linked to your account'}, status=404)
 
     # Determine Service based on today
     now = timezone.now()
@@ -97,40 +95,12 @@ def mark_attendance(request):
     
     # 2. Get/Create Attendance Record
     service_name = service.name if service else "Daily Service"
-    attendance, created = Attendance.objects.get_or_create(
-        date=today,
-        service=service if service else None,
-        defaults={
-            'service_type': service_name,
-            'total_count': 0
-        }
-    )
+    attendance = service_attendance(today, service, service_name)
     
-    # 3. Check if already marked
-    if MemberAttendance.objects.filter(attendance=attendance, member=member).exists():
+    # 3. Check in: counters and the MemberAttendance row commit together; the
+    # unique (attendance, member) constraint rejects a second check-in
+    if check_in(attendance, member) is None:
         return JsonResponse({'success': False, 'message': 'You have already marked attendance for today!'})
-        
-    # 4. Create MemberAttendance
-    MemberAttendance.objects.create(
-        attendance=attendance,
-        member=member,
-        status='Present'
-    )
-    
-    # 5. Update counts (simplified)
-    # Ideally use signals or a method on Attendance to recalc
-    attendance.refresh_from_db() # Get current state? No, aggregation better.
-    # Just increment for now or rely on the save method logic if it exists
-    # Check Attendance.save method...
-    
-    # Manual update for performance/simplicity in this view
-    if member.member_type == 'Guest':
-        attendance.first_timers_count += 1
-    elif member.age_group == 'Child': # Assuming field exists or simplified
-        attendance.children_count += 1
-    else:
-        attendance.adult_count += 1
-    attendance.save() # This triggers the total_count recalc in save() method
     
     return JsonResponse({
         'success': True, 
@@ -163,8 +133,9 @@ class MemberProfileView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('member-profile')
     
     def get_object(self, queryset=None):
-        # Match user email or fallback to first
-        member = Member.objects.filter(email=self.request.user.email).first() or Member.objects.first()
+        member = current_member(self.request)
+        if member is None:
+            raise Http404('No member profile is linked to your account')
         return member
 
     def get_context_data(self, **kwargs):
@@ -193,11 +164,7 @@ class MemberListView(LoginRequiredMixin, ListView):
         # Search
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) | 
-                Q(last_name__icontains=search) | 
-                Q(email__icontains=search)
-            )
+            queryset = filter_matching(queryset, search)
             
         # Tab Filters (type param)
         tab_type = self.request.GET.get('type') # 'members', 'first_timers', 'new_converts'
@@ -222,30 +189,7 @@ class MemberListView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         context['ministries'] = Ministry.objects.all()
         
-        # Stats Calculation
-        now = timezone.now()
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # 1. Total Members
-        total_members = Member.objects.count()
-        # Mock growth for demo (or calc real if needed)
-        
-        # 2. First Timers (Guests created this month)
-        first_timers_month = Member.objects.filter(member_type='Guest', created_at__gte=month_start).count()
-        
-        # 3. New Converts (Created this month)
-        new_converts_month = Member.objects.filter(member_type='New Convert', created_at__gte=month_start).count()
-        
-        # 4. Retention Rate (Active / Total)
-        active_members = Member.objects.filter(status='active').count()
-        retention_rate = int((active_members / total_members * 100)) if total_members > 0 else 0
-        
-        context['stats'] = {
-            'total_members': total_members,
-            'first_timers_month': first_timers_month,
-            'new_converts_month': new_converts_month,
-            'retention_rate': retention_rate
-        }
+        context['stats'] = member_stats()['cards']
         
         context['current_tab'] = self.request.GET.get('type', 'members')
         return context
@@ -264,11 +208,7 @@ class MemberListCreateView(generics.ListCreateAPIView):
         ministry_id = self.request.query_params.get('ministry_id')
 
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) | 
-                Q(last_name__icontains=search) | 
-                Q(email__icontains=search)
-            )
+            queryset = filter_matching(queryset, search)
         if member_type:
             queryset = queryset.filter(member_type=member_type)
         if status:
@@ -296,56 +236,7 @@ class MemberListCreateView(generics.ListCreateAPIView):
 
 class MemberStatsView(views.APIView):
     def get(self, request):
-        total = Member.objects.count()
-        active = Member.objects.filter(status='active').count()
-        
-        now = timezone.now()
-        new_this_month = Member.objects.filter(
-            membership_date__year=now.year, 
-            membership_date__month=now.month
-        ).count()
-        
-        guests = Member.objects.filter(member_type='Guest').count()
-        workers = Member.objects.filter(member_type='Worker').count() # Simplified, really should join Volunteer
-
-        # Charts
-        # 1. Growth
-        six_months_ago = now - timezone.timedelta(days=180)
-        growth_data = Member.objects.filter(membership_date__gte=six_months_ago)\
-            .annotate(month=TruncMonth('membership_date'))\
-            .values('month')\
-            .annotate(count=Count('id'))\
-            .order_by('month')
-        
-        growth = [{'month': d['month'].strftime('%Y-%m') if d['month'] else 'Unknown', 'count': d['count']} for d in growth_data]
-
-        # 2. Type Dist
-        type_dist = list(Member.objects.values('member_type').annotate(value=Count('id')).values('member_type', 'value'))
-        type_dist = [{'name': d['member_type'], 'value': d['value']} for d in type_dist]
-
-        # 3. Status Dist
-        status_dist = list(Member.objects.values('status').annotate(value=Count('id')).values('status', 'value'))
-        status_dist = [{'name': d['status'], 'value': d['value']} for d in status_dist]
-
-        # 4. Ministry Dist
-        min_dist = list(Member.objects.values('ministry__name').annotate(value=Count('id')).order_by('-value')[:5])
-        ministry_dist = [{'name': d['ministry__name'] or 'Unassigned', 'value': d['value']} for d in min_dist]
-
-        return Response({
-            'cards': {
-                'total': total,
-                'active': active,
-                'new_this_month': new_this_month,
-                'guests': guests,
-                'workers': workers
-            },
-            'charts': {
-                'growth': growth,
-                'typeDist': type_dist,
-                'statusDist': status_dist,
-                'ministryDist': ministry_dist
-            }
-        })
+        return Response(member_stats())
 
 from django.views.decorators.http import require_POST
 from django.http import JsonResponse
@@ -355,7 +246,7 @@ class MemberFamilyView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        member = Member.objects.filter(email=self.request.user.email).first() or Member.objects.first()
+        member = current_member(self.request)
         context['member'] = member
         context['user_name'] = self.request.user.first_name or self.request.user.username
         
@@ -375,9 +266,9 @@ def create_family_group(request):
     if not request.user.is_authenticated:
         return JsonResponse({'success': False, 'message': 'Please login first'}, status=401)
         
-    member = Member.objects.filter(email=request.user.email).first() or Member.objects.first()
+    member = current_member(request)
     if not member:
-         return JsonResponse({'success': False, 'message': 'Member profile not found'}, status=404)
+        return JsonResponse({'success': False, 'message': 'No member profile is linked to your account'}, status=404)
     
     if member.family:
         return JsonResponse({'success': False, 'message': 'You already belong to a family group'})
@@ -397,9 +288,9 @@ def link_family_member(request):
         return JsonResponse({'success': False, 'message': 'Please login first'}, status=401)
         
     # Get Current Member (Head of Request)
-    current_member = Member.objects.filter(email=request.user.email).first() or Member.objects.first()
-    if not current_member or not current_member.family:
-         return JsonResponse({'success': False, 'message': 'You must belong to a family group first'}, status=400)
+    member = current_member(request)
+    if not member or not member.family_id:
+        return JsonResponse({'success': False, 'message': 'You must belong to a family group first'}, status=400)
     
     import json
     data = json.loads(request.body)
@@ -419,7 +310,7 @@ def link_family_member(request):
         return JsonResponse({'success': False, 'message': f'{target_member.first_name} is already in a family group'}, status=400)
         
     # Link
-    target_member.family = current_member.family
+    target_member.family_id = member.family_id
     target_member.family_role = role
     target_member.save()
     
@@ -438,7 +329,7 @@ class MemberEventsView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        member = Member.objects.filter(email=self.request.user.email).first() or Member.objects.first()
+        member = current_member(self.request)
         context['member'] = member
         context['user_name'] = self.request.user.first_name or self.request.user.username
         
@@ -468,7 +359,7 @@ class MemberFinanceView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        member = Member.objects.filter(email=self.request.user.email).first() or Member.objects.first()
+        member = current_member(self.request)
         context['member'] = member
         context['user_name'] = self.request.user.first_name or self.request.user.username
         
@@ -503,7 +394,7 @@ class MemberAnnouncementsView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        member = Member.objects.filter(email=self.request.user.email).first() or Member.objects.first()
+        member = current_member(self.request)
         context['member'] = member
         context['user_name'] = self.request.user.first_name or self.request.user.username
         
@@ -7,6 +7,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from operations.models import Attendance, MemberAttendance
+from operations.checkins import recount_check_ins
 from people.models import Member
 
 def populate():
@@ -48,6 +49,9 @@ def populate():
             total_recs += len(objs)
             print(f"Created {len(objs)} records for {att.date}")
 
+        # bulk_create skips MemberAttendance.save, so bring the headcounts up to date
+        recount_check_ins()
+
     print(f"Done! Processed {count} services. Created {total_recs} granular records.")
 
 if __name__ == '__main__':
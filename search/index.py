@@ -0,0 +1,191 @@
+"""
+Global search over members, visitors, events, employees and transactions,
+backed by one SQLite FTS5 table (created in migrations/0001_initial.py).
+
+Each indexed object is one row whose rowid packs the object's pk and its
+kind (`pk << KIND_BITS | code`), so keeping a row current or dropping it is
+a rowid lookup, and a list view can narrow its queryset with a MATCH
+subquery instead of OR-ing `icontains` over every column.
+"""
+import re
+from typing import Callable, NamedTuple
+
+from django.apps import apps
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+TABLE = 'search_index'
+KIND_BITS = 3
+KIND_MASK = (1 << KIND_BITS) - 1
+
+# Title matches count ten times a body match in the ranking
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+
+# Words of the query, as FTS5's unicode61 tokenizer splits them
+_TOKEN = re.compile(r'[^\W_]+')
+MAX_TOKENS = 8
+
+
+def _join(*parts):
+    return ' '.join(str(p) for p in parts if p)
+
+
+class Source(NamedTuple):
+    code: int
+    model: str
+    # instance -> (title, body)
+    document: Callable
+    # Related objects the document reads, fetched up front when rebuilding
+    select_related: tuple = ()
+    url_name: str = None
+    super_admin_only: bool = False
+
+
+SOURCES = {
+    'member': Source(1, 'people.Member', lambda m: (
+        _join(m.first_name, m.last_name),
+        _join(m.email, m.phone, m.whatsapp_number, m.city, m.occupation),
+    ), url_name='member-update'),
+    'visitor': Source(2, 'outreach.Visitor', lambda v: (
+        _join(v.first_name, v.last_name),
+        _join(v.email, v.phone, v.whatsapp_number, v.city),
+    ), url_name='visitor-detail'),
+    'event': Source(3, 'events.Event', lambda e: (
+        e.title,
+        _join(e.location, e.description),
+    ), url_name='event-detail'),
+    'employee': Source(4, 'employees.Employee', lambda e: (
+        _join(e.first_name, e.last_name),
+        _join(e.employee_id, e.job_title, e.email, e.phone),
+    ), url_name='employee-detail', super_admin_only=True),
+    'income': Source(5, 'operations.Finance', lambda f: (
+        _join(f.category, f.member and _join(f.member.first_name, f.member.last_name)),
+        f.description,
+    ), select_related=('member',)),
+    'expense': Source(6, 'operations.Expense', lambda e: (
+        e.category,
+        e.description,
+    )),
+}
+KIND_BY_CODE = {source.code: kind for kind, source in SOURCES.items()}
+
+
+def source_for(model):
+    """(kind, Source) indexing `model`, or (None, None)."""
+    label = model._meta.label
+    for kind, source in SOURCES.items():
+        if source.model == label:
+            return kind, source
+    return None, None
+
+
+def _rowid(source, pk):
+    return pk << KIND_BITS | source.code
+
+
+def match_expression(query):
+    """
+    FTS5 query for free text: every word must match the start of a word in the
+    document ("jo sm" finds John Smith). None when the text has no words.
+    """
+    tokens = _TOKEN.findall((query or '').lower())[:MAX_TOKENS]
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def index_object(instance):
+    kind, source = source_for(type(instance))
+    if source is None:
+        return
+    title, body = source.document(instance)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)',
+            [_rowid(source, instance.pk), title or '', body or ''],
+        )
+
+
+def remove_object(model, pk):
+    kind, source = source_for(model)
+    if source is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [_rowid(source, pk)])
+
+
+def rebuild(batch_size=2000):
+    """Re-index every source from scratch; returns {kind: rows indexed}."""
+    counts = {}
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for kind, source in SOURCES.items():
+            model = apps.get_model(source.model)
+            batch = []
+            counts[kind] = 0
+            for instance in model.objects.select_related(*source.select_related).iterator(chunk_size=batch_size):
+                title, body = source.document(instance)
+                batch.append((_rowid(source, instance.pk), title or '', body or ''))
+                if len(batch) >= batch_size:
+                    cursor.executemany(f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)', batch)
+                    counts[kind] += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)', batch)
+                counts[kind] += len(batch)
+        # Merge the b-trees written above into one
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return counts
+
+
+def filter_matching(queryset, query):
+    """
+    `queryset` narrowed to the objects whose indexed text matches `query`, as one
+    `pk IN (SELECT ... MATCH ...)` subquery; the model must be one of SOURCES.
+    """
+    kind, source = source_for(queryset.model)
+    expression = match_expression(query)
+    if expression is None:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid >> {KIND_BITS} FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid & {KIND_MASK} = %s',
+        (expression, source.code),
+    ))
+
+
+def search(query, kinds=None, limit=20):
+    """
+    Best matches across `kinds` (default: all), best first. Each hit is a dict
+    with kind, id, title, a snippet of the body, url (None for transactions) and
+    score (bm25, lower is better). Served from the index alone, in one query.
+    """
+    expression = match_expression(query)
+    kinds = [kind for kind in (kinds or SOURCES) if kind in SOURCES]
+    if expression is None or not kinds:
+        return []
+
+    codes = [SOURCES[kind].code for kind in kinds]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, title, snippet({TABLE}, 1, '', '', '…', 12), bm25({TABLE}, %s, %s) AS score "
+            f"FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid & {KIND_MASK} IN ({', '.join(['%s'] * len(codes))}) "
+            f"ORDER BY score LIMIT %s",
+            [TITLE_WEIGHT, BODY_WEIGHT, expression, *codes, limit],
+        )
+        rows = cursor.fetchall()
+
+    hits = []
+    for rowid, title, snippet, score in rows:
+        kind = KIND_BY_CODE[rowid & KIND_MASK]
+        pk = rowid >> KIND_BITS
+        url_name = SOURCES[kind].url_name
+        hits.append({
+            'kind': kind,
+            'id': pk,
+            'title': title,
+            'snippet': snippet,
+            'url': reverse(url_name, args=[pk]) if url_name else None,
+            'score': score,
+        })
+    return hits
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from search import index, typeahead
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the global search index (members, visitors, events, employees, income, expenses) '
+            'and the member/user typeahead keys')
+
+    def handle(self, *args, **options):
+        # bulk_create and queryset.update() skip signals, so run this after bulk loads
+        self.stdout.write("Rebuilding search index...")
+        counts = index.rebuild()
+        summary = ', '.join(f'{n} {kind}' for kind, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {sum(counts.values())} objects ({summary}).'))
+
+        self.stdout.write("Rebuilding typeahead keys...")
+        counts = typeahead.rebuild()
+        summary = ', '.join(f'{n} {kind}' for kind, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {sum(counts.values())} people ({summary}).'))
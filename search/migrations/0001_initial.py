@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        # rowid = object pk << 3 | kind code (see search.index); prefix indexes
+        # keep "jo sm"-style prefix queries off the full term list
+        migrations.RunSQL(
+            sql="CREATE VIRTUAL TABLE search_index USING fts5("
+                "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+            reverse_sql='DROP TABLE search_index',
+        ),
+    ]
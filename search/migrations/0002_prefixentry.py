@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrefixEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('object_id', models.IntegerField()),
+                ('key', models.CharField(max_length=255)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'key', 'object_id'], name='prefix_kind_key_idx'), models.Index(fields=['kind', 'object_id'], name='prefix_kind_object_idx')],
+            },
+        ),
+    ]
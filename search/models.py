@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class PrefixEntry(models.Model):
+    """
+    One typeahead key of a member or user (normalized name, reversed name,
+    email or phone digits; see search.typeahead). Prefix lookups are a range
+    scan of kind_key_idx, which also covers object_id.
+    """
+    kind = models.CharField(max_length=10)
+    object_id = models.IntegerField()
+    key = models.CharField(max_length=255)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'key', 'object_id'], name='prefix_kind_key_idx'),
+            models.Index(fields=['kind', 'object_id'], name='prefix_kind_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.key}"
@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from . import index, typeahead
+
+
+def reindex(sender, instance, **kwargs):
+    index.index_object(instance)
+
+
+def unindex(sender, instance, **kwargs):
+    index.remove_object(sender, instance.pk)
+
+
+def refresh_prefixes(sender, instance, update_fields=None, **kwargs):
+    typeahead.index_object(instance, update_fields)
+
+
+def drop_prefixes(sender, instance, **kwargs):
+    typeahead.remove_object(sender, instance.pk)
+
+
+def remember_member_name(sender, instance, **kwargs):
+    # Income rows are indexed under the giver's name, so a rename re-indexes them
+    instance._search_previous_name = None
+    if instance.pk:
+        instance._search_previous_name = sender.objects.filter(pk=instance.pk).values_list('first_name', 'last_name').first()
+
+
+def reindex_member_giving(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_search_previous_name', None)
+    if previous and previous != (instance.first_name, instance.last_name):
+        for finance in instance.finance_set.select_related('member'):
+            index.index_object(finance)
+
+
+def _receivers():
+    for source in index.SOURCES.values():
+        model = apps.get_model(source.model)
+        yield post_save, reindex, model, f'search_post_save_{model.__name__}'
+        yield post_delete, unindex, model, f'search_post_delete_{model.__name__}'
+    for source in typeahead.SOURCES.values():
+        model = apps.get_model(source.model)
+        yield post_save, refresh_prefixes, model, f'typeahead_post_save_{model.__name__}'
+        yield post_delete, drop_prefixes, model, f'typeahead_post_delete_{model.__name__}'
+    member = apps.get_model('people.Member')
+    yield pre_save, remember_member_name, member, 'search_pre_save_Member'
+    yield post_save, reindex_member_giving, member, 'search_giving_post_save_Member'
+
+
+def connect():
+    for signal, receiver, model, uid in _receivers():
+        signal.connect(receiver, sender=model, dispatch_uid=uid)
+
+
+def disconnect():
+    for signal, receiver, model, uid in _receivers():
+        signal.disconnect(sender=model, dispatch_uid=uid)
+
+
+@contextmanager
+def bulk_load():
+    """
+    Mute the per-row index updates for mass deletes/inserts (seeding, imports;
+    bulk_create sends no signals anyway) and rebuild the search index and the
+    typeahead keys once at the end.
+    """
+    disconnect()
+    try:
+        yield
+    finally:
+        connect()
+        index.rebuild()
+        typeahead.rebuild()
+
+
+connect()
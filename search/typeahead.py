@@ -0,0 +1,151 @@
+"""
+Typeahead over member and user names, emails and phone numbers.
+
+Every person gets a few normalized keys in PrefixEntry ("john smith",
+"smith john", "john@example.com", "08031234567"); a prefix is answered by a
+range scan over the (kind, key) index that stops after a few dozen rows, so
+the cost does not grow with the number of members.
+"""
+import re
+import unicodedata
+from typing import Callable, NamedTuple
+
+from django.apps import apps
+from django.db import transaction
+
+from .models import PrefixEntry
+
+# Sorts after every character a key can hold, closing the prefix range
+_RANGE_END = chr(0x10FFFF)
+_SPACE = re.compile(r'\s+')
+_PHONE = re.compile(r'^[\d\s()+\-.]+$')
+MAX_KEY_LENGTH = 255
+
+
+def normalize(text):
+    """Lower case, accents stripped, whitespace collapsed: 'Jóhn  Smith ' -> 'john smith'."""
+    text = unicodedata.normalize('NFKD', str(text or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _SPACE.sub(' ', text).strip().lower()[:MAX_KEY_LENGTH]
+
+
+def digits(phone):
+    return re.sub(r'\D', '', phone or '')
+
+
+def _name_keys(first, last):
+    return [f'{first} {last}', f'{last} {first}']
+
+
+class TypeaheadSource(NamedTuple):
+    model: str
+    # Fields the keys are built from; saves touching none of them (e.g. last_login) are skipped
+    fields: tuple
+    # instance -> raw keys (normalized before storing)
+    keys: Callable
+    # instance -> JSON-ready result
+    result: Callable
+
+
+SOURCES = {
+    'member': TypeaheadSource(
+        'people.Member',
+        ('first_name', 'last_name', 'email', 'phone', 'whatsapp_number'),
+        lambda m: _name_keys(m.first_name, m.last_name) + [m.email, digits(m.phone), digits(m.whatsapp_number)],
+        lambda m: {
+            'id': m.id,
+            'name': f'{m.first_name} {m.last_name}',
+            'first_name': m.first_name,
+            'last_name': m.last_name,
+            'email': m.email,
+            'phone': m.phone,
+            'family_id': m.family_id,
+        },
+    ),
+    'user': TypeaheadSource(
+        'core.User',
+        ('username', 'first_name', 'last_name', 'email'),
+        lambda u: [u.username, u.email] + (_name_keys(u.first_name, u.last_name) if u.first_name or u.last_name else []),
+        lambda u: {
+            'id': u.id,
+            'name': u.get_full_name() or u.username,
+            'username': u.username,
+            'email': u.email,
+        },
+    ),
+}
+
+
+def source_for(model):
+    label = model._meta.label
+    for kind, source in SOURCES.items():
+        if source.model == label:
+            return kind, source
+    return None, None
+
+
+def _entries(kind, source, instance):
+    keys = {normalize(key) for key in source.keys(instance)}
+    return [PrefixEntry(kind=kind, object_id=instance.pk, key=key) for key in sorted(keys) if key]
+
+
+def index_object(instance, update_fields=None):
+    kind, source = source_for(type(instance))
+    if source is None or (update_fields and not set(update_fields) & set(source.fields)):
+        return
+    with transaction.atomic():
+        PrefixEntry.objects.filter(kind=kind, object_id=instance.pk).delete()
+        PrefixEntry.objects.bulk_create(_entries(kind, source, instance))
+
+
+def remove_object(model, pk):
+    kind, source = source_for(model)
+    if source is not None:
+        PrefixEntry.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rebuild(batch_size=2000):
+    """Re-create every key from scratch; returns {kind: people indexed}."""
+    counts = {}
+    with transaction.atomic():
+        PrefixEntry.objects.all().delete()
+        for kind, source in SOURCES.items():
+            model = apps.get_model(source.model)
+            batch = []
+            counts[kind] = 0
+            for instance in model.objects.only('pk', *source.fields).iterator(chunk_size=batch_size):
+                batch.extend(_entries(kind, source, instance))
+                counts[kind] += 1
+                if len(batch) >= batch_size:
+                    PrefixEntry.objects.bulk_create(batch)
+                    batch = []
+            PrefixEntry.objects.bulk_create(batch)
+    return counts
+
+
+def normalize_query(query):
+    """Phone-looking input is matched on its digits, anything else like a name/email."""
+    if _PHONE.match(query or '') and digits(query):
+        return digits(query)
+    return normalize(query)
+
+
+def suggest(query, kind='member', limit=10):
+    """The first `limit` people of `kind` with a key starting with `query`, in key order."""
+    source = SOURCES[kind]
+    prefix = normalize_query(query)
+    if not prefix:
+        return []
+
+    # One person can match on several keys (name and email), so read a few extra
+    ids = []
+    candidates = PrefixEntry.objects.filter(kind=kind, key__gte=prefix, key__lt=prefix + _RANGE_END)\
+        .order_by('key').values_list('object_id', flat=True)[:limit * 4]
+    for object_id in candidates:
+        if object_id not in ids:
+            ids.append(object_id)
+            if len(ids) == limit:
+                break
+
+    objects = apps.get_model(source.model).objects.in_bulk(ids)
+    return [source.result(objects[pk]) for pk in ids if pk in objects]
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from .views import SearchView, TypeaheadView
+
+urlpatterns = [
+    path('', SearchView.as_view(), name='api-search'),
+    path('typeahead/', TypeaheadView.as_view(), name='api-typeahead'),
+]
@@ -0,0 +1,45 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views import View
+
+from . import typeahead
+from .index import SOURCES, search
+
+MAX_LIMIT = 50
+MAX_SUGGESTIONS = 25
+
+
+class SearchView(LoginRequiredMixin, View):
+    """
+    Ranked search across everything in the index:
+    GET ?q=<text>[&kind=member&kind=event...][&limit=20]
+    """
+
+    def get(self, request):
+        query = request.GET.get('q', '').strip()
+        is_super_admin = request.user.role_id == 1
+        allowed = [kind for kind, source in SOURCES.items() if is_super_admin or not source.super_admin_only]
+        kinds = [kind for kind in request.GET.getlist('kind') if kind in allowed] or allowed
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = 20
+        return JsonResponse({'query': query, 'results': search(query, kinds, limit)})
+
+
+class TypeaheadView(LoginRequiredMixin, View):
+    """
+    Name/email/phone prefix suggestions: GET ?q=<prefix>[&kind=member|user][&limit=10].
+    Users are only suggested to super admins.
+    """
+
+    def get(self, request):
+        query = request.GET.get('q', '')
+        kind = request.GET.get('kind', 'member')
+        if kind not in typeahead.SOURCES or (kind == 'user' and request.user.role_id != 1):
+            return JsonResponse({'error': f'Unknown kind {kind!r}'}, status=400)
+        try:
+            limit = min(max(int(request.GET.get('limit', 10)), 1), MAX_SUGGESTIONS)
+        except ValueError:
+            limit = 10
+        return JsonResponse({'query': query, 'results': typeahead.suggest(query, kind, limit)})
@@ -1,4 +1,7 @@
 #!/bin/bash
 python manage.py migrate
+python manage.py createcachetable
+python manage.py rebuild_rollups
+python manage.py rebuild_search_index
 python manage.py collectstatic --noinput
 gunicorn --bind=0.0.0.0:8000 --timeout 600 config.wsgi